@@ -0,0 +1,105 @@
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+import math
+import os
+import statistics
+import threading
+import time
+
+
+class AdmissionController:
+    """Caps concurrent LLM requests with a bounded FIFO wait queue and per-request deadlines"""
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 32, queue_timeout: float = 10.0,
+                 window: int = 1000):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self.in_flight = 0
+        self.admitted_total = 0
+        self.shed_total = 0
+        # Recent wait times (seconds) and outcomes for percentiles and shed rate
+        self._wait_times = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Build from LLM_MAX_IN_FLIGHT, LLM_MAX_QUEUE and LLM_QUEUE_TIMEOUT"""
+        return cls(
+            max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "8")),
+            max_queue=int(os.getenv("LLM_MAX_QUEUE", "32")),
+            queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+        )
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Take a generation slot; False means the request should be shed"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        start = time.monotonic()
+
+        with self._lock:
+            if self.in_flight < self.max_in_flight and not self._waiters:
+                self.in_flight += 1
+                self._record(True, 0.0)
+                return True
+            if len(self._waiters) >= self.max_queue:
+                self._record(False, 0.0)
+                return False
+            ticket = threading.Event()
+            self._waiters.append(ticket)
+
+        granted = ticket.wait(timeout)
+
+        with self._lock:
+            # release() may have handed us the slot just as the deadline passed
+            if not granted and ticket.is_set():
+                granted = True
+            if not granted:
+                self._waiters.remove(ticket)
+            self._record(granted, time.monotonic() - start)
+        return granted
+
+    def release(self):
+        """Return a slot, handing it straight to the oldest waiter if there is one"""
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self.in_flight -= 1
+
+    @contextmanager
+    def admit(self, timeout: float = None):
+        """Context manager yielding whether the request was admitted"""
+        admitted = self.acquire(timeout)
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release()
+
+    def _record(self, admitted: bool, waited: float):
+        if admitted:
+            self.admitted_total += 1
+        else:
+            self.shed_total += 1
+        self._wait_times.append(waited)
+        self._outcomes.append(admitted)
+
+    def metrics(self) -> Dict[str, float]:
+        """Current queue depth, in-flight count, wait time percentiles and shed rate"""
+        with self._lock:
+            waits = sorted(self._wait_times)
+            outcomes = list(self._outcomes)
+            metrics = {
+                "in_flight": self.in_flight,
+                "queue_depth": len(self._waiters),
+                "admitted_total": self.admitted_total,
+                "shed_total": self.shed_total,
+            }
+        metrics["shed_rate"] = (outcomes.count(False) / len(outcomes)) if outcomes else 0.0
+        metrics["wait_p50_ms"] = statistics.median(waits) * 1000 if waits else 0.0
+        # Nearest-rank p95, so it never falls below the median on a small window
+        metrics["wait_p95_ms"] = waits[math.ceil(0.95 * len(waits)) - 1] * 1000 if waits else 0.0
+        return metrics
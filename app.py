@@ -4,7 +4,11 @@ Interactive UI for asking questions about the scraped NeoSapients pages
 """
 
 import streamlit as st
-from milvus_manager import MilvusManager
+from chatbot import open_milvus_from_env
+from retrieval_context import RetrievalContext
+from admission import AdmissionController
+from lexical_index import min_relevance
+from chat_history import ChatHistory
 from openai import OpenAI
 import os
 from dotenv import load_dotenv
@@ -57,28 +61,44 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Chat history limits (messages rendered, per-session archive budget)
+CHAT_WINDOW_SIZE = int(os.getenv("CHAT_WINDOW_SIZE", "20"))
+CHAT_MAX_ARCHIVE_KB = int(os.getenv("CHAT_MAX_ARCHIVE_KB", "256"))
+
 # Initialize session state
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+if "history" not in st.session_state:
+    st.session_state.history = ChatHistory(
+        window_size=CHAT_WINDOW_SIZE,
+        max_archive_bytes=CHAT_MAX_ARCHIVE_KB * 1024
+    )
+if "earlier_blocks" not in st.session_state:
+    st.session_state.earlier_blocks = 0
 if "milvus" not in st.session_state:
     st.session_state.milvus = None
+if "retrieval_context" not in st.session_state:
+    st.session_state.retrieval_context = None
 
 # Initialize Milvus
 @st.cache_resource
 def init_milvus():
     """Initialize Milvus connection"""
-    milvus = MilvusManager()
-    milvus.connect()
-    milvus.load_collection()
-    return milvus
+    return open_milvus_from_env()
+
+# One generation governor shared by every session in this server process
+@st.cache_resource
+def init_governor():
+    """Create the LLM admission controller"""
+    return AdmissionController.from_env()
+
+def show_earlier_block():
+    """Expand one more archived block of the chat history"""
+    st.session_state.earlier_blocks += 1
 
 # Query function
-def query_rag(question: str, use_openai: bool = True, top_k: int = 5):
+def query_rag(question: str, use_openai: bool = True, top_k: int = 5, source: str = None):
     """Query the RAG system"""
-    milvus = st.session_state.milvus
-    
-    # Retrieve relevant documents
-    results = milvus.search(question, top_k=top_k)
+    # Retrieve relevant documents (follow-ups reuse the previous turn's hits)
+    results = st.session_state.retrieval_context.retrieve(question, top_k=top_k, source=source)
     
     print(f"DEBUG: Query: '{question}'")
     print(f"DEBUG: Results count: {len(results) if results else 0}")
@@ -91,11 +111,11 @@ def query_rag(question: str, use_openai: bool = True, top_k: int = 5):
         }
     
     # Check relevance
-    best_score = results[0]['score']
+    best_score = max(doc['score'] for doc in results)
     print(f"DEBUG: Best score: {best_score}")
     print(f"DEBUG: Top result: {results[0]['title']}")
     
-    if best_score < 0.25:
+    if best_score < min_relevance(st.session_state.milvus.retrieval_mode, 0.25):
         return {
             "answer": "I don't have any information to answer that question. I can only answer questions based on the specific documents I was trained on.",
             "sources": [],
@@ -109,9 +129,11 @@ def query_rag(question: str, use_openai: bool = True, top_k: int = 5):
     ])
     
     # Generate answer
-    if use_openai and os.getenv("OPENAI_API_KEY"):
+    governor = init_governor()
+    admitted = use_openai and os.getenv("OPENAI_API_KEY") and governor.acquire()
+    if admitted:
         try:
-            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL"))
             
             system_prompt = """You are a helpful assistant that answers questions based on the provided context from NeoSapients documentation.
 
@@ -131,7 +153,7 @@ Question: {question}
 Provide a helpful answer based on the context above."""
 
             response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
@@ -143,6 +165,11 @@ Provide a helpful answer based on the context above."""
             answer = response.choices[0].message.content
         except Exception as e:
             answer = f"Error generating response: {str(e)}\n\nHere's the retrieved context:\n{context[:500]}..."
+        finally:
+            governor.release()
+    elif use_openai and os.getenv("OPENAI_API_KEY"):
+        # Shed under overload: same retrieval-only answer as without an API key
+        answer = f"**Retrieved Information:**\n\n{results[0]['text']}\n\n*Note: The assistant is busy, so this is the most relevant passage instead of an AI-generated answer*"
     else:
         # Fallback: just show the retrieved context
         answer = f"**Retrieved Information:**\n\n{results[0]['text']}\n\n*Note: Add OpenAI API key to .env for AI-generated answers*"
@@ -163,6 +190,23 @@ Provide a helpful answer based on the context above."""
         "relevance": best_score
     }
 
+def render_message(message: dict):
+    """Render a single chat message"""
+    if message["role"] == "user":
+        st.markdown(f"""
+            <div class="chat-message user-message">
+                <b>🧑 You:</b><br>
+                {message["content"]}
+            </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.markdown(f"""
+            <div class="chat-message assistant-message">
+                <b>🤖 Assistant:</b><br>
+                {message["content"]}
+            </div>
+        """, unsafe_allow_html=True)
+
 # Main app
 def main():
     # Header
@@ -173,6 +217,8 @@ def main():
     if st.session_state.milvus is None:
         with st.spinner("Connecting to knowledge base..."):
             st.session_state.milvus = init_milvus()
+    if st.session_state.retrieval_context is None:
+        st.session_state.retrieval_context = RetrievalContext(st.session_state.milvus)
     
     # Sidebar
     with st.sidebar:
@@ -190,6 +236,17 @@ def main():
         
         top_k = st.slider("Number of sources to retrieve", 1, 10, 5)
         
+        metrics = init_governor().metrics()
+        st.caption(
+            f"LLM load: {metrics['in_flight']} in flight, {metrics['queue_depth']} queued, "
+            f"wait p95 {metrics['wait_p95_ms']:.0f} ms, shed {metrics['shed_rate']:.0%}"
+        )
+        
+        source = st.text_input(
+            "Restrict to site (optional)",
+            placeholder="e.g. neosapients.ai"
+        ).strip().lower() or None
+        
         st.divider()
         
         st.header("📚 Knowledge Base")
@@ -206,38 +263,21 @@ def main():
             "What career opportunities are available?",
         ]
         
+        pending_question = None
         for question in example_questions:
             if st.button(question, key=f"ex_{question}"):
-                st.session_state.messages.append({"role": "user", "content": question})
-                st.rerun()
+                pending_question = question
         
         st.divider()
         
         if st.button("🗑️ Clear Chat History"):
-            st.session_state.messages = []
-            st.rerun()
+            st.session_state.history.clear()
+            st.session_state.earlier_blocks = 0
+            st.session_state.retrieval_context.reset()
     
-    # Chat container
+    # Chat container (filled after input is processed so no extra rerun is needed)
     chat_container = st.container()
     
-    # Display chat messages
-    with chat_container:
-        for message in st.session_state.messages:
-            if message["role"] == "user":
-                st.markdown(f"""
-                    <div class="chat-message user-message">
-                        <b>🧑 You:</b><br>
-                        {message["content"]}
-                    </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                    <div class="chat-message assistant-message">
-                        <b>🤖 Assistant:</b><br>
-                        {message["content"]}
-                    </div>
-                """, unsafe_allow_html=True)
-    
     # Input box at the bottom
     st.divider()
     
@@ -255,24 +295,44 @@ def main():
     with col2:
         send_button = st.button("Send", type="primary", use_container_width=True)
     
-    # Process question
     if send_button and user_question:
+        pending_question = user_question
+    
+    history = st.session_state.history
+    
+    # Process question
+    if pending_question:
         # Add user message
-        st.session_state.messages.append({"role": "user", "content": user_question})
+        history.append({"role": "user", "content": pending_question})
         
         # Get response
         with st.spinner("Thinking..."):
-            result = query_rag(user_question, use_openai=use_openai, top_k=top_k)
+            result = query_rag(pending_question, use_openai=use_openai, top_k=top_k, source=source)
         
         # Add assistant message
-        st.session_state.messages.append({
+        history.append({
             "role": "assistant",
             "content": result["answer"],
             "sources": result["sources"]
         })
+    
+    # Display chat messages
+    with chat_container:
+        # Oldest first: the discarded note, then the loaded archive blocks, then the live window
+        if history.dropped_count:
+            st.caption(f"{history.dropped_count} older messages were discarded to save memory")
+        
+        earlier = history.load_earlier(st.session_state.earlier_blocks)
+        remaining = history.hidden_count() - len(earlier)
+        if remaining > 0:
+            # on_click runs before the rerun, so the label already reflects the expanded view
+            st.button(f"Show earlier messages ({remaining} hidden)", key="load_earlier",
+                      on_click=show_earlier_block)
+        for message in earlier:
+            render_message(message)
         
-        # Rerun to update chat
-        st.rerun()
+        for message in history.recent_messages():
+            render_message(message)
 
 if __name__ == "__main__":
     main()
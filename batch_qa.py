@@ -0,0 +1,217 @@
+"""
+Bulk offline question answering
+Reads questions from a JSONL file, retrieves context in batched encoder/search calls,
+generates answers with bounded concurrency and streams them to an output JSONL.
+Questions already present in the output are skipped, so an interrupted run resumes.
+
+Input lines:  {"id": "q1", "question": "What is Context OS?", "source": "neosapients.ai"}
+              (id defaults to the line number; source is optional)
+Output lines: {"id", "question", "answer", "sources", "retrieval_ms", "generation_ms"}
+"""
+
+from chatbot import RAGChatbot, open_milvus_from_env
+from admission import AdmissionController
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import defaultdict
+from typing import List, Dict, Set
+from dotenv import load_dotenv
+import argparse
+import json
+import math
+import os
+import statistics
+import time
+
+
+def read_questions(path: str) -> List[Dict]:
+    """Load questions, assigning line numbers as ids where missing"""
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item['id'] = str(item.get('id', line_number))
+            questions.append(item)
+    return questions
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids already answered in a previous (possibly interrupted) run"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.add(str(json.loads(line)['id']))
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def truncate_partial_line(path: str):
+    """Cut off a half-written last line so appended records start on a fresh line"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def percentiles(values: List[float]) -> str:
+    """Format p50/p95/p99/max of millisecond samples"""
+    if not values:
+        return "n/a"
+    ordered = sorted(values)
+    # Nearest rank, as in AdmissionController.metrics()
+    pick = lambda q: ordered[math.ceil(q * len(ordered)) - 1]
+    return (f"p50={statistics.median(ordered):.1f}ms p95={pick(0.95):.1f}ms "
+            f"p99={pick(0.99):.1f}ms max={ordered[-1]:.1f}ms")
+
+
+class BatchAnswerer:
+    """Batched retrieval plus concurrent generation over a question file"""
+
+    def __init__(self, milvus_manager, chatbot: RAGChatbot, batch_size: int = 64,
+                 concurrency: int = 8, top_k: int = 5):
+        self.milvus = milvus_manager
+        self.chatbot = chatbot
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.top_k = top_k
+        self.timings = defaultdict(list)
+
+    def retrieve_batch(self, items: List[Dict]) -> List[List[Dict]]:
+        """One encoder call for the batch, then retrieval in the configured RETRIEVAL_MODE"""
+        mode = self.milvus.retrieval_mode
+        embeddings = None
+        if mode != "lexical":
+            start = time.perf_counter()
+            embeddings = self.milvus.encoder.encode([item['question'] for item in items],
+                                                    batch_size=self.batch_size)
+            self.timings['encode_batch'].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        if mode != "dense":
+            # Same retrieval as chatbot.py/app.py serve, reusing the batch embeddings
+            results = [
+                self.milvus.search(item['question'], top_k=self.top_k, source=item.get('source'),
+                                   query_embedding=None if embeddings is None else embeddings[i])
+                for i, item in enumerate(items)
+            ]
+            self.timings['search_batch'].append((time.perf_counter() - start) * 1000)
+            return results
+
+        by_source = defaultdict(list)
+        for idx, item in enumerate(items):
+            by_source[item.get('source')].append(idx)
+
+        results = [None] * len(items)
+        for source, indices in by_source.items():
+            hits = self.milvus.search_vectors([embeddings[i] for i in indices],
+                                              top_k=self.top_k, source=source)
+            for i, item_hits in zip(indices, hits):
+                results[i] = item_hits
+        self.timings['search_batch'].append((time.perf_counter() - start) * 1000)
+        return results
+
+    def generate(self, item: Dict, hits: List[Dict], retrieval_ms: float) -> Dict:
+        """Answer one question from its retrieved hits (runs on the worker pool)"""
+        start = time.perf_counter()
+        answer = self.chatbot.answer(item['question'], hits)
+        generation_ms = (time.perf_counter() - start) * 1000
+        return {
+            'id': item['id'],
+            'question': item['question'],
+            'answer': answer,
+            'sources': [{'title': h['title'], 'url': h['url'], 'score': h['score']} for h in hits[:3]],
+            'retrieval_ms': round(retrieval_ms, 2),
+            'generation_ms': round(generation_ms, 2),
+        }
+
+    def run(self, input_path: str, output_path: str):
+        """Answer every question not yet in output_path, appending results as they finish"""
+        questions = read_questions(input_path)
+        truncate_partial_line(output_path)
+        done = completed_ids(output_path)
+        todo = [item for item in questions if item['id'] not in done]
+        print(f"{len(questions)} questions, {len(done)} already answered, {len(todo)} to go")
+
+        written = errors = 0
+        run_start = time.perf_counter()
+
+        with open(output_path, 'a', encoding='utf-8') as out, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+
+            def drain(futures):
+                nonlocal written, errors
+                for future in futures:
+                    record = future.result()
+                    self.timings['generation'].append(record['generation_ms'])
+                    self.timings['end_to_end'].append(record['retrieval_ms'] + record['generation_ms'])
+                    # Failed generations are not checkpointed, so the next run retries them
+                    if record['answer'].startswith("Error generating response"):
+                        errors += 1
+                        continue
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    written += 1
+
+            pending = set()
+            for start in range(0, len(todo), self.batch_size):
+                batch = todo[start:start + self.batch_size]
+                batch_start = time.perf_counter()
+                hits = self.retrieve_batch(batch)
+                retrieval_ms = (time.perf_counter() - batch_start) * 1000 / len(batch)
+
+                for item, item_hits in zip(batch, hits):
+                    pending.add(executor.submit(self.generate, item, item_hits, retrieval_ms))
+
+                # Keep retrieval a few batches ahead of generation, no further
+                while len(pending) > self.concurrency * 4:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    drain(finished)
+                print(f"  retrieved {min(start + self.batch_size, len(todo))}/{len(todo)}, "
+                      f"answered {written}")
+
+            finished, _ = wait(pending)
+            drain(finished)
+
+        elapsed = time.perf_counter() - run_start
+        self.report(written, errors, elapsed)
+
+    def report(self, written: int, errors: int, elapsed: float):
+        """Print throughput and per-stage latency percentiles"""
+        print("\n" + "=" * 70)
+        print("BATCH SUMMARY")
+        print("=" * 70)
+        print(f"Answered {written} questions in {elapsed:.1f}s "
+              f"({written / elapsed if elapsed else 0:.2f} questions/s), {errors} errors (will retry)")
+        print(f"  encode (per batch of {self.batch_size}): {percentiles(self.timings['encode_batch'])}")
+        print(f"  search (per batch):            {percentiles(self.timings['search_batch'])}")
+        print(f"  generation (per question):     {percentiles(self.timings['generation'])}")
+        print(f"  end to end (per question):     {percentiles(self.timings['end_to_end'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions in bulk")
+    parser.add_argument("input", help="Questions JSONL")
+    parser.add_argument("output", help="Answers JSONL (appended to; existing ids are skipped)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Questions per encoder/search call")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent LLM requests")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    load_dotenv()
+    milvus = open_milvus_from_env()
+
+    # The thread pool already bounds concurrency; the governor only has to admit every call
+    governor = AdmissionController(max_in_flight=args.concurrency, max_queue=args.concurrency,
+                                   queue_timeout=3600)
+    chatbot = RAGChatbot(milvus, governor=governor)
+
+    BatchAnswerer(milvus, chatbot, batch_size=args.batch_size,
+                  concurrency=args.concurrency, top_k=args.top_k).run(args.input, args.output)
+    milvus.disconnect()
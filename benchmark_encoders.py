@@ -0,0 +1,71 @@
+"""
+Benchmark encoder backends: parity with the eager PyTorch reference, batch-1 latency
+and batch-256 throughput
+"""
+
+import glob
+import statistics
+import sys
+import time
+from encoders import BACKENDS, create_encoder, parity_check
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+SINGLE_QUERIES = 200
+BATCH_SIZE = 256
+
+
+def load_texts() -> list:
+    """Sentences from scraped pages, or synthetic ones if main.py has not been run"""
+    texts = []
+    for path in sorted(glob.glob("scraped_pages/*.txt")):
+        with open(path, 'r', encoding='utf-8') as f:
+            body = f.read().split("=" * 80, 1)[-1]
+        texts.extend(s.strip() for s in body.split(". ") if len(s.strip()) > 20)
+    if len(texts) < BATCH_SIZE:
+        texts.extend(f"Synthetic benchmark sentence number {i} about AI agents and Context OS."
+                     for i in range(BATCH_SIZE - len(texts)))
+    return texts
+
+
+def run_benchmark(threads: int = None):
+    """Compare every backend that can be loaded in this environment"""
+    texts = load_texts()
+    batch = texts[:BATCH_SIZE]
+    reference = create_encoder(MODEL_NAME, backend="torch", threads=threads)
+
+    print("=" * 80)
+    print("ENCODER BACKEND BENCHMARK")
+    print("=" * 80)
+    print(f"model={MODEL_NAME}, threads={threads or 'default'}, parity texts={len(texts)}\n")
+    print(f"{'backend':>11} {'min cos':>9} {'max drift':>10} {'b=1 p50':>10} {'b=1 p95':>10} "
+          f"{'b=256 texts/s':>14}")
+
+    for backend in BACKENDS:
+        try:
+            encoder = reference if backend == "torch" else create_encoder(MODEL_NAME, backend, threads)
+        except ImportError as e:
+            print(f"{backend:>11}  skipped: {e}")
+            continue
+
+        parity = parity_check(reference, encoder, texts)
+
+        # Warm up
+        encoder.encode(batch[:8])
+
+        latencies = []
+        for text in texts[:SINGLE_QUERIES]:
+            start = time.perf_counter()
+            encoder.encode([text])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        encoder.encode(batch, batch_size=BATCH_SIZE)
+        throughput = len(batch) / (time.perf_counter() - start)
+
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{backend:>11} {parity['min_cosine']:>9.5f} {parity['max_drift']:>10.5f} "
+              f"{statistics.median(latencies):>8.2f}ms {p95:>8.2f}ms {throughput:>14.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark(threads=int(sys.argv[1]) if len(sys.argv) > 1 else None)
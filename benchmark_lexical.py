@@ -0,0 +1,71 @@
+"""
+Compare per-query latency and CPU time of dense, lexical, hybrid and auto retrieval
+Run after main.py so the collection and its BM25 index exist
+"""
+
+import statistics
+import time
+from milvus_manager import MilvusManager
+
+QUERIES = [
+    "Context OS",
+    "NeoSapients",
+    "terms of use",
+    "careers",
+    "What is NeoSapients?",
+    "What is Context OS?",
+    "Tell me about AI agents",
+    "What industries do you serve?",
+    "What are your career opportunities?",
+]
+ROUNDS = 20
+TOP_K = 5
+
+
+def run_benchmark():
+    """Time each retrieval mode over the same query set"""
+    milvus = MilvusManager()
+    milvus.connect()
+    milvus.load_collection()
+
+    if not len(milvus.lexical):
+        print(f"No BM25 index found at {milvus.lexical_path}; run main.py first")
+        milvus.disconnect()
+        return
+
+    print("=" * 80)
+    print("LEXICAL VS DENSE RETRIEVAL BENCHMARK")
+    print("=" * 80)
+    print(f"{len(milvus.lexical)} chunks, {len(QUERIES)} queries x {ROUNDS} rounds, top_k={TOP_K}\n")
+    print(f"{'mode':>8} {'p50':>10} {'p95':>10} {'cpu/query':>12}")
+
+    for mode in ["dense", "lexical", "hybrid", "auto"]:
+        # Warm up
+        for query in QUERIES:
+            milvus.search(query, top_k=TOP_K, mode=mode)
+
+        latencies = []
+        cpu_start = time.process_time()
+        for _ in range(ROUNDS):
+            for query in QUERIES:
+                start = time.perf_counter()
+                milvus.search(query, top_k=TOP_K, mode=mode)
+                latencies.append((time.perf_counter() - start) * 1000)
+        cpu_ms = (time.process_time() - cpu_start) * 1000 / len(latencies)
+
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{mode:>8} {statistics.median(latencies):>8.2f}ms {p95:>8.2f}ms {cpu_ms:>10.2f}ms")
+
+    print("\nTop hit per mode:")
+    for query in QUERIES[:4]:
+        print(f"\n  {query}")
+        for mode in ["dense", "lexical", "hybrid"]:
+            results = milvus.search(query, top_k=1, mode=mode)
+            title = results[0]['title'] if results else "-"
+            print(f"    {mode:>8}: {title}")
+
+    milvus.disconnect()
+
+
+if __name__ == "__main__":
+    run_benchmark()
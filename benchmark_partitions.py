@@ -0,0 +1,86 @@
+"""
+Benchmark scoped (single source site) vs global search latency
+Uses synthetic vectors in a separate Milvus Lite file, so the real collection is untouched
+"""
+
+import os
+import shutil
+import statistics
+import time
+import numpy as np
+from milvus_manager import MilvusManager
+
+BENCH_DB = "./bench_partitions.db"
+SOURCE_COUNTS = [1, 4, 16, 64]
+CHUNKS_PER_SOURCE = 500
+NUM_QUERIES = 200
+TOP_K = 5
+
+
+def time_queries(milvus: MilvusManager, queries: np.ndarray, sources=None) -> list:
+    """Run each query once and return latencies in milliseconds"""
+    latencies = []
+    for i, query in enumerate(queries):
+        source = sources[i] if sources else None
+        start = time.perf_counter()
+        milvus.search_vector(query, top_k=TOP_K, source=source)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run_benchmark():
+    """Grow the number of sources and compare scoped and global search"""
+    rng = np.random.default_rng(42)
+
+    milvus = MilvusManager(collection_name="bench_partitions", uri=BENCH_DB)
+    milvus.connect()
+
+    print("=" * 80)
+    print("PARTITIONED SEARCH BENCHMARK")
+    print("=" * 80)
+    print(f"{CHUNKS_PER_SOURCE} chunks per source, {NUM_QUERIES} queries, top_k={TOP_K}\n")
+    print(f"{'sources':>8} {'chunks':>8} {'global p50':>12} {'global p95':>12} "
+          f"{'scoped p50':>12} {'scoped p95':>12}")
+
+    for n_sources in SOURCE_COUNTS:
+        milvus.create_collection()
+
+        source_names = [f"site{i}.example.com" for i in range(n_sources)]
+        for name in source_names:
+            vectors = rng.standard_normal((CHUNKS_PER_SOURCE, milvus.embedding_dim)).astype(np.float32)
+            records = [
+                {'text': f"{name} chunk {j}", 'url': f"https://{name}/page",
+                 'title': name, 'chunk_index': j, 'source': name}
+                for j in range(CHUNKS_PER_SOURCE)
+            ]
+            milvus.insert_vectors(vectors.tolist(), records)
+        milvus.collection.flush()
+        milvus.load_collection()
+
+        queries = rng.standard_normal((NUM_QUERIES, milvus.embedding_dim)).astype(np.float32)
+        query_sources = [source_names[i % n_sources] for i in range(NUM_QUERIES)]
+
+        # Warm up both paths before timing
+        time_queries(milvus, queries[:10])
+        time_queries(milvus, queries[:10], query_sources[:10])
+
+        global_ms = time_queries(milvus, queries)
+        scoped_ms = time_queries(milvus, queries, query_sources)
+
+        def p95(values):
+            return statistics.quantiles(values, n=20)[-1]
+
+        print(f"{n_sources:>8} {n_sources * CHUNKS_PER_SOURCE:>8} "
+              f"{statistics.median(global_ms):>10.2f}ms {p95(global_ms):>10.2f}ms "
+              f"{statistics.median(scoped_ms):>10.2f}ms {p95(scoped_ms):>10.2f}ms")
+
+    milvus.disconnect()
+    # Recent Milvus Lite versions store the database as a directory
+    if os.path.isdir(BENCH_DB):
+        shutil.rmtree(BENCH_DB)
+    elif os.path.exists(BENCH_DB):
+        os.remove(BENCH_DB)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,114 @@
+"""
+Benchmark sharded scatter-gather search throughput as shards are added
+The synthetic corpus is split across 1, 2 and 4 shards, each a separate Milvus Lite file.
+
+Milvus Lite shards all run on this machine and compete for the same CPU cores. Each
+query still scans the whole corpus in total, so throughput does not scale with the shard
+count here; the numbers show the scatter-gather overhead only. To measure scaling, point
+BENCH_SHARD_URIS at Milvus servers on separate hosts, e.g.
+    BENCH_SHARD_URIS=http://milvus-a:19530,http://milvus-b:19530 python benchmark_shards.py
+The first 1, 2, ... of them are used, and the bench_shards collection is dropped afterwards.
+"""
+
+import glob
+import os
+import shutil
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import numpy as np
+from pymilvus import utility
+from sharded_milvus import ShardedMilvusManager
+
+SHARD_COUNTS = [1, 2, 4]
+SERVER_URIS = [uri.strip() for uri in os.getenv("BENCH_SHARD_URIS", "").split(",") if uri.strip()]
+CORPUS_SIZE = 100000
+NUM_QUERIES = 400
+CLIENT_THREADS = 8
+TOP_K = 5
+
+
+def cleanup():
+    """Remove benchmark shard files (recent Milvus Lite versions store them as directories)"""
+    for path in glob.glob("./bench_shard_*.db*"):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+
+def shard_uris(n_shards: int) -> List[str]:
+    """The first n_shards benchmark servers, or local Milvus Lite files"""
+    if SERVER_URIS:
+        return SERVER_URIS[:n_shards]
+    return [f"./bench_shard_{i}.db" for i in range(n_shards)]
+
+
+def run_benchmark():
+    """Load the corpus into 1..N shards and measure query throughput"""
+    rng = np.random.default_rng(7)
+    dim = 384
+    corpus = rng.standard_normal((CORPUS_SIZE, dim)).astype(np.float32)
+    records = [
+        {'text': f"chunk {i}", 'url': f"https://bench.example.com/page{i // 50}",
+         'title': "bench", 'chunk_index': i % 50, 'source': "bench.example.com"}
+        for i in range(CORPUS_SIZE)
+    ]
+    queries = rng.standard_normal((NUM_QUERIES, dim)).astype(np.float32)
+
+    print("=" * 80)
+    print("SHARDED SEARCH BENCHMARK")
+    print("=" * 80)
+    print(f"{CORPUS_SIZE} chunks, {NUM_QUERIES} queries, {CLIENT_THREADS} client threads, top_k={TOP_K}")
+    if SERVER_URIS:
+        print(f"Shards: {len(SERVER_URIS)} Milvus servers from BENCH_SHARD_URIS\n")
+    else:
+        print("Shards: local Milvus Lite files sharing this machine's CPU; "
+              "expect no throughput scaling (see module docstring)\n")
+    print(f"{'shards':>7} {'queries/s':>10} {'p50':>10} {'p95':>10} {'speedup':>8}")
+
+    shard_counts = [n for n in SHARD_COUNTS if not SERVER_URIS or n <= len(SERVER_URIS)]
+    baseline_qps = None
+    for n_shards in shard_counts:
+        cleanup()
+        milvus = ShardedMilvusManager(shard_uris(n_shards), collection_name="bench_shards",
+                                      max_concurrent_searches=CLIENT_THREADS)
+        milvus.connect()
+        milvus.create_collection()
+        for start in range(0, CORPUS_SIZE, 5000):
+            milvus.insert_vectors(corpus[start:start + 5000].tolist(), records[start:start + 5000])
+        for shard in milvus.shards:
+            shard.collection.flush()
+        milvus.load_collection()
+
+        # Warm up
+        for query in queries[:10]:
+            milvus.search_vector(query, top_k=TOP_K)
+
+        def timed(query):
+            start = time.perf_counter()
+            milvus.search_vector(query, top_k=TOP_K)
+            return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=CLIENT_THREADS) as clients:
+            latencies = list(clients.map(timed, queries))
+        elapsed = time.perf_counter() - start
+
+        qps = NUM_QUERIES / elapsed
+        baseline_qps = baseline_qps or qps
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{n_shards:>7} {qps:>10.1f} {statistics.median(latencies):>8.2f}ms "
+              f"{p95:>8.2f}ms {qps / baseline_qps:>7.2f}x")
+
+        if SERVER_URIS:
+            for shard in milvus.shards:
+                utility.drop_collection(shard.collection_name, using=shard.alias)
+        milvus.disconnect()
+
+    cleanup()
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,71 @@
+from collections import deque
+from typing import List, Dict
+import json
+import zlib
+
+
+class ChatHistory:
+    """Bounded chat transcript that keeps recent messages live and archives older ones compressed"""
+
+    def __init__(self, window_size: int = 20, block_size: int = 10,
+                 max_archive_bytes: int = 256 * 1024):
+        self.window_size = window_size
+        self.block_size = block_size
+        self.max_archive_bytes = max_archive_bytes
+        self.recent = deque()
+        # Each archived block is (message_count, zlib-compressed JSON), oldest first
+        self.archive = deque()
+        self.archive_bytes = 0
+        self.dropped_count = 0
+
+    def append(self, message: Dict):
+        """Add a message, spilling the oldest ones to the archive when the window is full"""
+        self.recent.append(message)
+        if len(self.recent) > self.window_size + self.block_size:
+            block = [self.recent.popleft() for _ in range(self.block_size)]
+            self._archive_block(block)
+
+    def _archive_block(self, block: List[Dict]):
+        """Compress a block of messages and enforce the per-session memory cap"""
+        payload = zlib.compress(json.dumps(block).encode('utf-8'))
+        self.archive.append((len(block), payload))
+        self.archive_bytes += len(payload)
+
+        # Forget the oldest turns once the session exceeds its budget
+        while self.archive and self.archive_bytes > self.max_archive_bytes:
+            count, dropped = self.archive.popleft()
+            self.archive_bytes -= len(dropped)
+            self.dropped_count += count
+
+    def recent_messages(self) -> List[Dict]:
+        """Return the last window_size messages"""
+        start = max(0, len(self.recent) - self.window_size)
+        return [self.recent[i] for i in range(start, len(self.recent))]
+
+    def hidden_count(self) -> int:
+        """Number of stored messages not included in recent_messages()"""
+        archived = sum(count for count, _ in self.archive)
+        return archived + max(0, len(self.recent) - self.window_size)
+
+    def load_earlier(self, n_blocks: int) -> List[Dict]:
+        """Decompress the newest n_blocks archived blocks plus any overflow from the window"""
+        if n_blocks <= 0:
+            return []
+
+        messages = []
+        for _, payload in list(self.archive)[-n_blocks:]:
+            messages.extend(json.loads(zlib.decompress(payload).decode('utf-8')))
+
+        overflow = max(0, len(self.recent) - self.window_size)
+        messages.extend(self.recent[i] for i in range(overflow))
+        return messages
+
+    def clear(self):
+        """Remove all messages"""
+        self.recent.clear()
+        self.archive.clear()
+        self.archive_bytes = 0
+        self.dropped_count = 0
+
+    def __len__(self) -> int:
+        return len(self.recent) + sum(count for count, _ in self.archive)
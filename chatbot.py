@@ -1,4 +1,8 @@
 from milvus_manager import MilvusManager
+from sharded_milvus import ShardedMilvusManager
+from retrieval_context import RetrievalContext
+from admission import AdmissionController
+from lexical_index import min_relevance
 from openai import OpenAI
 import os
 from dotenv import load_dotenv
@@ -7,9 +11,14 @@ from dotenv import load_dotenv
 class RAGChatbot:
     """RAG-based chatbot that only answers based on stored documents"""
     
-    def __init__(self, milvus_manager: MilvusManager, api_key: str = None):
+    def __init__(self, milvus_manager: MilvusManager, api_key: str = None, base_url: str = None,
+                 governor: AdmissionController = None, model: str = None):
         self.milvus = milvus_manager
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"),
+                             base_url=base_url or os.getenv("OPENAI_BASE_URL"))
+        # Limits concurrent LLM calls; shed requests get a retrieval-only answer
+        self.governor = governor or AdmissionController.from_env()
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
         
     def is_relevant_query(self, query: str, context_docs: list) -> bool:
         """Check if the query is relevant to the retrieved documents"""
@@ -19,13 +28,22 @@ class RAGChatbot:
         
         # If the best match has a score below threshold, consider irrelevant
         best_score = max([doc['score'] for doc in context_docs])
-        return best_score > 0.3  # Threshold can be adjusted
+        mode = getattr(self.milvus, 'retrieval_mode', 'dense')
+        return best_score > min_relevance(mode, 0.3)  # Threshold can be adjusted
     
-    def generate_response(self, query: str, top_k: int = 5) -> str:
-        """Generate a response based on retrieved documents"""
-        # Retrieve relevant documents
-        results = self.milvus.search(query, top_k=top_k)
+    def generate_response(self, query: str, top_k: int = 5, source: str = None,
+                          retrieval_context: RetrievalContext = None) -> str:
+        """Generate a response based on retrieved documents, optionally from one source site"""
+        # Retrieve relevant documents (reusing the previous turn's hits for follow-ups)
+        if retrieval_context is not None:
+            results = retrieval_context.retrieve(query, top_k=top_k, source=source)
+        else:
+            results = self.milvus.search(query, top_k=top_k, source=source)
         
+        return self.answer(query, results)
+    
+    def answer(self, query: str, results: list) -> str:
+        """Answer a query from already retrieved documents"""
         if not results:
             return "I don't have any information to answer that question. I can only answer questions based on the specific documents I was trained on."
         
@@ -57,27 +75,34 @@ Question: {query}
 
 Answer based ONLY on the context above. If the context doesn't contain relevant information, say so."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
-            )
-            
-            answer = response.choices[0].message.content
-            
-            # Add source references
-            sources = list(set([f"{doc['title']} ({doc['url']})" for doc in results[:3]]))
-            sources_text = "\n\nSources:\n" + "\n".join([f"- {s}" for s in sources])
-            
-            return answer + sources_text
+        # Add source references
+        sources = list(set([f"{doc['title']} ({doc['url']})" for doc in results[:3]]))
+        sources_text = "\n\nSources:\n" + "\n".join([f"- {s}" for s in sources])
+        
+        with self.governor.admit() as admitted:
+            if not admitted:
+                # Overloaded: answer from retrieval alone instead of queueing without bound
+                return (f"Retrieved Information:\n\n{results[0]['text']}\n\n"
+                        f"(The assistant is busy, so this is the most relevant passage rather than a generated answer.)"
+                        + sources_text)
             
-        except Exception as e:
-            return f"Error generating response: {str(e)}"
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=500
+                )
+                
+                answer = response.choices[0].message.content
+                
+                return answer + sources_text
+                
+            except Exception as e:
+                return f"Error generating response: {str(e)}"
     
     def chat(self):
         """Interactive chat interface"""
@@ -86,6 +111,8 @@ Answer based ONLY on the context above. If the context doesn't contain relevant
         print("Type 'quit' or 'exit' to end the conversation")
         print("=" * 70)
         
+        retrieval_context = RetrievalContext(self.milvus)
+        
         while True:
             query = input("\nYou: ").strip()
             
@@ -97,17 +124,45 @@ Answer based ONLY on the context above. If the context doesn't contain relevant
                 continue
             
             print("\nAssistant: ", end="")
-            response = self.generate_response(query)
+            response = self.generate_response(query, retrieval_context=retrieval_context)
             print(response)
 
 
+def open_milvus_from_env(allow_artifact: bool = True):
+    """Open the index configured in .env (artifact, shards or a single Milvus instance)
+    
+    Writers pass allow_artifact=False to always get the live Milvus index.
+    """
+    artifact_path = os.getenv("INDEX_ARTIFACT") if allow_artifact else None
+    shard_uris = os.getenv("MILVUS_SHARD_URIS")
+    retrieval_mode = os.getenv("RETRIEVAL_MODE", "dense")
+    if artifact_path:
+        milvus = MilvusManager(retrieval_mode=retrieval_mode)
+        milvus.open_artifact(artifact_path)
+    else:
+        if shard_uris:
+            milvus = ShardedMilvusManager(
+                [uri.strip() for uri in shard_uris.split(",") if uri.strip()],
+                retrieval_mode=retrieval_mode,
+                max_concurrent_searches=int(os.getenv("MILVUS_MAX_CONCURRENT_SEARCHES", "8"))
+            )
+        else:
+            milvus = MilvusManager(
+                host=os.getenv("MILVUS_HOST", "localhost"),
+                port=os.getenv("MILVUS_PORT", "19530"),
+                uri=os.getenv("MILVUS_URI", "./milvus_demo.db") or None,
+                retrieval_mode=retrieval_mode
+            )
+        milvus.connect()
+        milvus.load_collection()
+    return milvus
+
+
 if __name__ == "__main__":
     load_dotenv()
     
     # Initialize Milvus manager
-    milvus = MilvusManager()
-    milvus.connect()
-    milvus.load_collection()
+    milvus = open_milvus_from_env()
     
     # Create chatbot
     chatbot = RAGChatbot(milvus)
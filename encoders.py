@@ -0,0 +1,87 @@
+"""
+Sentence encoder backends for CPU inference
+All backends return a SentenceTransformer, so callers keep using encoder.encode(...)
+
+    torch       eager PyTorch (reference)
+    torch-int8  PyTorch with dynamic int8 quantization of the Linear layers
+    onnx        exported ONNX graph run by onnxruntime
+    onnx-int8   ONNX graph with dynamic int8 quantization
+"""
+
+from sentence_transformers import SentenceTransformer, __version__ as st_version
+from typing import List, Dict, Optional
+import os
+import numpy as np
+
+BACKENDS = ["torch", "torch-int8", "onnx", "onnx-int8"]
+ENCODER_CACHE_DIR = "./encoder_cache"
+
+
+def create_encoder(model_name: str, backend: Optional[str] = None,
+                   threads: Optional[int] = None) -> SentenceTransformer:
+    """Load model_name with the requested backend (defaults from ENCODER_BACKEND / ENCODER_THREADS)"""
+    backend = backend or os.getenv("ENCODER_BACKEND", "torch")
+    if threads is None and os.getenv("ENCODER_THREADS"):
+        threads = int(os.getenv("ENCODER_THREADS"))
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+    if backend.startswith("torch"):
+        import torch
+        if threads:
+            torch.set_num_threads(threads)
+        encoder = SentenceTransformer(model_name, device="cpu")
+        if backend == "torch-int8":
+            encoder = torch.quantization.quantize_dynamic(encoder, {torch.nn.Linear}, dtype=torch.qint8)
+        return encoder
+
+    # backend="onnx" and export_dynamic_quantized_onnx_model arrived in sentence-transformers 3.2
+    if tuple(int(part) for part in st_version.split(".")[:2]) < (3, 2):
+        raise ImportError(f"The {backend} encoder backend needs sentence-transformers>=3.2 "
+                          f"(installed: {st_version})")
+
+    try:
+        import onnxruntime
+    except ImportError:
+        raise ImportError(f"The {backend} encoder backend needs onnxruntime and optimum: "
+                          f"pip install 'sentence-transformers[onnx]'")
+
+    session_options = onnxruntime.SessionOptions()
+    if threads:
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+    model_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+    # onnx-int8: export and quantize once into the local cache, then load the quantized graph
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    local_dir = os.path.join(ENCODER_CACHE_DIR, model_name.replace("/", "--") + "-onnx")
+    quantized_file = "onnx/model_qint8_avx2.onnx"
+    if not os.path.exists(os.path.join(local_dir, quantized_file)):
+        print(f"Exporting int8 ONNX encoder to {local_dir}...")
+        onnx_model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        onnx_model.save(local_dir)
+        export_dynamic_quantized_onnx_model(onnx_model, "avx2", local_dir)
+
+    model_kwargs["file_name"] = quantized_file
+    return SentenceTransformer(local_dir, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+
+def parity_check(reference: SentenceTransformer, candidate: SentenceTransformer,
+                 texts: List[str], batch_size: int = 64) -> Dict[str, float]:
+    """Cosine similarity between reference and candidate embeddings of the same texts"""
+    expected = np.asarray(reference.encode(texts, batch_size=batch_size), dtype=np.float32)
+    actual = np.asarray(candidate.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    actual /= np.linalg.norm(actual, axis=1, keepdims=True)
+    cosine = np.sum(expected * actual, axis=1)
+
+    return {
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "max_drift": float(1.0 - cosine.min()),
+    }
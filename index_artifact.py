@@ -0,0 +1,241 @@
+"""
+Portable index artifacts
+Exports a Milvus collection (vectors, metadata, index settings, embedding model)
+to a versioned directory that replicas can open read-only without re-embedding.
+
+Layout:
+    manifest.json         format version, model identity, dimensions, index params
+    embeddings.npy        float32 [count, dim], L2-normalized, memory-mapped on open
+    metadata.jsonl        one JSON record per row (text, url, title, chunk_index, source)
+    metadata.offsets.npy  uint64 [count + 1] byte offsets into metadata.jsonl
+    lexical.bm25.npz      BM25 index over the chunk texts
+"""
+
+from typing import List, Dict
+from datetime import datetime, timezone
+import argparse
+import json
+import mmap
+import os
+import numpy as np
+
+from milvus_manager import MilvusManager
+from text_processor import source_from_url
+from lexical_index import BM25Index
+
+
+ARTIFACT_FORMAT = "neo-rag-index"
+ARTIFACT_VERSION = 1
+METADATA_FIELDS = ["text", "url", "title", "chunk_index", "source"]
+
+
+class IndexArtifact:
+    """Read-only, memory-mapped view of an exported index"""
+
+    def __init__(self, path: str, manifest: Dict, embeddings: np.ndarray,
+                 offsets: np.ndarray, metadata: mmap.mmap):
+        self.path = path
+        self.manifest = manifest
+        self.embeddings = embeddings
+        self.offsets = offsets
+        self._metadata = metadata
+        self._source_rows = None
+
+    @classmethod
+    def open(cls, path: str, expected_model: str = None, expected_dim: int = None):
+        """Open an artifact directory, validating its format and embedding model"""
+        with open(os.path.join(path, "manifest.json"), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"{path} is not an index artifact")
+        if manifest.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported artifact version: {manifest.get('version')}")
+        if expected_model and manifest["model"] != expected_model:
+            raise ValueError(f"Artifact was built with {manifest['model']}, "
+                             f"but the encoder is {expected_model}")
+        if expected_dim and manifest["embedding_dim"] != expected_dim:
+            raise ValueError(f"Artifact dimension {manifest['embedding_dim']} "
+                             f"does not match encoder dimension {expected_dim}")
+
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode='r')
+        offsets = np.load(os.path.join(path, "metadata.offsets.npy"), mmap_mode='r')
+        if embeddings.shape != (manifest["count"], manifest["embedding_dim"]):
+            raise ValueError(f"Artifact embeddings have shape {embeddings.shape}, "
+                             f"expected ({manifest['count']}, {manifest['embedding_dim']})")
+
+        with open(os.path.join(path, "metadata.jsonl"), 'rb') as f:
+            if manifest["count"]:
+                metadata = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                metadata = b""
+
+        return cls(path, manifest, embeddings, offsets, metadata)
+
+    def __len__(self) -> int:
+        return self.manifest["count"]
+
+    def record(self, row: int) -> Dict:
+        """Read the metadata record for a single row"""
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._metadata[start:end])
+
+    def records(self, start: int = 0, stop: int = None) -> List[Dict]:
+        """Read metadata records for a contiguous range of rows"""
+        stop = len(self) if stop is None else stop
+        return [self.record(row) for row in range(start, stop)]
+
+    def lexical_index(self) -> BM25Index:
+        """Load the bundled BM25 index (empty if the artifact predates it)"""
+        path = os.path.join(self.path, "lexical.bm25.npz")
+        return BM25Index.load(path) if os.path.exists(path) else BM25Index()
+
+    def rows_for_source(self, source: str) -> np.ndarray:
+        """Row indices belonging to one source site (index built on first use)"""
+        if self._source_rows is None:
+            groups = {}
+            for row in range(len(self)):
+                record = self.record(row)
+                key = record.get('source') or source_from_url(record['url'])
+                groups.setdefault(key, []).append(row)
+            self._source_rows = {key: np.asarray(rows, dtype=np.int64) for key, rows in groups.items()}
+        return self._source_rows.get(source, np.empty(0, dtype=np.int64))
+
+    def search(self, query_embedding, top_k: int = 5, source: str = None) -> List[Dict]:
+        """Exact cosine search over the memory-mapped vectors"""
+        rows = self.rows_for_source(source) if source else None
+        if len(self) == 0 or (rows is not None and len(rows) == 0):
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = (self.embeddings if rows is None else self.embeddings[rows]) @ query
+        top_k = min(top_k, len(scores))
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        ranked = candidates[np.argsort(-scores[candidates])]
+
+        results = []
+        for idx in ranked:
+            row = idx if rows is None else rows[idx]
+            result = self.record(int(row))
+            result['score'] = float(scores[idx])
+            results.append(result)
+        return results
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so dot product equals cosine similarity"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def write_artifact(path: str, embeddings: np.ndarray, records: List[Dict], manifest: Dict):
+    """Write vectors and metadata records to an artifact directory"""
+    os.makedirs(path, exist_ok=True)
+
+    embeddings = _normalize(np.asarray(embeddings, dtype=np.float32))
+    np.save(os.path.join(path, "embeddings.npy"), embeddings)
+
+    offsets = [0]
+    with open(os.path.join(path, "metadata.jsonl"), 'wb') as f:
+        for record in records:
+            record = dict(record, source=record.get('source') or source_from_url(record['url']))
+            line = (json.dumps({field: record.get(field) for field in METADATA_FIELDS},
+                               ensure_ascii=False) + "\n").encode('utf-8')
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    np.save(os.path.join(path, "metadata.offsets.npy"), np.asarray(offsets, dtype=np.uint64))
+
+    lexical = BM25Index()
+    lexical.add([dict(r, source=r.get('source') or source_from_url(r['url'])) for r in records])
+    lexical.save(os.path.join(path, "lexical.bm25.npz"))
+
+    manifest = dict(manifest)
+    manifest.update({
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "count": len(records),
+        "embedding_dim": int(embeddings.shape[1]) if len(records) else manifest.get("embedding_dim"),
+        "dtype": "float32",
+        "normalized": True,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    })
+    # Manifest is written last so a partially written artifact never validates
+    with open(os.path.join(path, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def export_index(milvus_manager, path: str, batch_size: int = 1000):
+    """Export every row of the manager's collection to an artifact"""
+    if not milvus_manager.collection:
+        milvus_manager.load_collection()
+
+    embeddings = []
+    records = []
+    iterator = milvus_manager.collection.query_iterator(
+        batch_size=batch_size,
+        expr="id >= 0",
+        output_fields=["embedding"] + METADATA_FIELDS
+    )
+    while True:
+        batch = iterator.next()
+        if not batch:
+            iterator.close()
+            break
+        for row in batch:
+            embeddings.append(row['embedding'])
+            records.append(row)
+
+    write_artifact(
+        path,
+        np.asarray(embeddings, dtype=np.float32).reshape(len(records), milvus_manager.embedding_dim),
+        records,
+        {
+            "model": milvus_manager.model_name,
+            "embedding_dim": milvus_manager.embedding_dim,
+            "metric_type": milvus_manager.index_params["metric_type"],
+            "index_params": milvus_manager.index_params,
+            "search_params": milvus_manager.search_params,
+            "source_collection": milvus_manager.collection_name,
+        }
+    )
+    print(f"Exported {len(records)} chunks to {path}")
+
+
+def import_index(milvus_manager, path: str, batch_size: int = 1000):
+    """Recreate the manager's collection from an artifact, reusing stored vectors"""
+    artifact = IndexArtifact.open(path, expected_model=milvus_manager.model_name,
+                                  expected_dim=milvus_manager.embedding_dim)
+    milvus_manager.index_params = artifact.manifest["index_params"]
+    milvus_manager.create_collection()
+
+    for start in range(0, len(artifact), batch_size):
+        stop = min(start + batch_size, len(artifact))
+        milvus_manager.insert_vectors(
+            np.asarray(artifact.embeddings[start:stop]).tolist(),
+            artifact.records(start, stop)
+        )
+    milvus_manager.collection.flush()
+    milvus_manager.lexical.save(milvus_manager.lexical_path)
+    print(f"Imported {len(artifact)} chunks from {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a portable index artifact")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path", help="Artifact directory")
+    parser.add_argument("--collection", default="rag_documents")
+    args = parser.parse_args()
+
+    milvus = MilvusManager(collection_name=args.collection)
+    milvus.connect()
+    if args.action == "export":
+        milvus.export_artifact(args.path)
+    else:
+        milvus.import_artifact(args.path)
+        milvus.load_collection()
+    milvus.disconnect()
@@ -0,0 +1,123 @@
+"""
+Zero-downtime blue/green index rebuilds
+Ingests into a new versioned collection (rag_documents_v<timestamp>), warms it up,
+then atomically repoints the stable collection alias that serving processes search.
+Retired versions are dropped by later rebuilds (or --gc) once their grace period has passed.
+"""
+
+from pymilvus import Collection, utility
+from milvus_manager import MilvusManager
+from typing import List, Dict, Optional
+import os
+import re
+import shutil
+import time
+
+
+def versions(milvus: MilvusManager) -> List[str]:
+    """Versioned collections behind milvus.collection_name, oldest first"""
+    pattern = re.compile(rf"^{re.escape(milvus.collection_name)}_v(\d+)$")
+    names = [name for name in utility.list_collections(using=milvus.alias) if pattern.match(name)]
+    return sorted(names, key=lambda name: int(pattern.match(name).group(1)))
+
+
+def current_version(milvus: MilvusManager) -> Optional[str]:
+    """Collection the stable alias currently points to"""
+    for name in versions(milvus):
+        if milvus.collection_name in utility.list_aliases(name, using=milvus.alias):
+            return name
+    return None
+
+
+def swap_alias(milvus: MilvusManager, target: str):
+    """Point the stable alias at target in one metadata operation"""
+    stable_name = milvus.collection_name
+    if current_version(milvus):
+        utility.alter_alias(target, stable_name, using=milvus.alias)
+    else:
+        # First rebuild: a plain collection still holds the stable name and must make way
+        # for the alias. This one-time migration has a gap of a single metadata call.
+        if utility.has_collection(stable_name, using=milvus.alias):
+            utility.drop_collection(stable_name, using=milvus.alias)
+            print(f"Dropped unversioned collection {stable_name} to create its alias")
+        utility.create_alias(target, stable_name, using=milvus.alias)
+    print(f"Alias {stable_name} -> {target}")
+
+
+def version_timestamp(milvus: MilvusManager, name: str) -> int:
+    """Build start time encoded in a version's name"""
+    return int(name[len(milvus.collection_name) + 2:])
+
+
+def drop_old_versions(milvus: MilvusManager, keep_previous: int = 0, grace_seconds: float = 0):
+    """Drop versions the alias no longer points to, keeping the newest keep_previous of them
+
+    A version is only dropped once it has been out of service for grace_seconds, so
+    queries still running against it can finish. Retirement times are not recorded,
+    but a version was swapped out no later than the build start of the version after
+    its successor, which bounds how long it has been retired. The version swapped out
+    most recently has no such bound and survives until the next rebuild, unless
+    grace_seconds is 0 (e.g. `python main.py --gc` once in-flight queries have drained).
+    """
+    current = current_version(milvus)
+    all_versions = versions(milvus)
+    old = [name for name in all_versions if name != current]
+    now = time.time()
+    for name in old[:max(0, len(old) - keep_previous)]:
+        if grace_seconds:
+            later = all_versions[all_versions.index(name) + 2:]
+            if not later or now - version_timestamp(milvus, later[0]) < grace_seconds:
+                print(f"Keeping {name} until its grace period has passed")
+                continue
+        utility.drop_collection(name, using=milvus.alias)
+        _remove_lexical_file(milvus, name)
+        print(f"Dropped old index version: {name}")
+
+
+def _remove_lexical_file(milvus: MilvusManager, name: str):
+    lexical_path = MilvusManager._lexical_path_for(milvus.uri, name)
+    if os.path.exists(lexical_path):
+        os.remove(lexical_path)
+
+
+def blue_green_rebuild(milvus: MilvusManager, chunks: List[Dict], probe_queries: List[str],
+                       grace_seconds: float = 300, keep_previous: int = 0) -> str:
+    """Build a new index version next to the live one and switch serving over to it"""
+    builder = MilvusManager(
+        collection_name=f"{milvus.collection_name}_v{int(time.time())}",
+        host=milvus.host,
+        port=milvus.port,
+        uri=milvus.uri,
+        num_partitions=milvus.num_partitions,
+        alias=milvus.alias,
+        encoder=milvus.encoder
+    )
+    print(f"Building new index version: {builder.collection_name}")
+
+    builder.create_collection()
+    builder.insert_documents(chunks)
+    builder.load_collection()
+
+    # Warm the new version and refuse to swap to an index that cannot answer
+    for query in probe_queries:
+        if not builder.search(query, top_k=3, mode="dense"):
+            utility.drop_collection(builder.collection_name, using=milvus.alias)
+            _remove_lexical_file(milvus, builder.collection_name)
+            raise RuntimeError(f"Probe query returned no results: {query!r}; "
+                               f"kept serving the current version")
+    print(f"Warmed {builder.collection_name} with {len(probe_queries)} probe queries")
+
+    swap_alias(milvus, builder.collection_name)
+
+    # Serving processes reload the BM25 file when its mtime changes; replace it atomically
+    if os.path.exists(builder.lexical_path):
+        staging = milvus.lexical_path + ".tmp"
+        shutil.copyfile(builder.lexical_path, staging)
+        os.replace(staging, milvus.lexical_path)
+
+    milvus.collection = Collection(milvus.collection_name, using=milvus.alias)
+    milvus.lexical = builder.lexical
+
+    # No waiting here: versions still inside their grace period are dropped by a later run
+    drop_old_versions(milvus, keep_previous=keep_previous, grace_seconds=grace_seconds)
+    return builder.collection_name
@@ -0,0 +1,234 @@
+"""
+In-process BM25 lexical index over chunk texts
+Postings are stored as flat numpy arrays (CSR layout) with precomputed IDF and
+per-posting BM25 weights, so a query is a handful of array slices and adds.
+"""
+
+from typing import List, Dict, Optional, Callable
+from collections import Counter
+import json
+import math
+import os
+import re
+import numpy as np
+
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how",
+    "i", "in", "is", "it", "me", "of", "on", "or", "tell", "that", "the", "this", "to",
+    "what", "when", "where", "which", "who", "why", "with", "you", "your", "about"
+}
+RECORD_FIELDS = ["text", "url", "title", "chunk_index", "source"]
+# Lexical-mode relevance threshold: most query terms must appear (2 of 3, but not 1 of 2)
+LEXICAL_MIN_SCORE = 0.6
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [t for t in re.findall(r"\w+", text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """BM25 inverted index with array-backed postings"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.records = []
+        self.dirty = False
+        self._reset_arrays()
+
+    def _reset_arrays(self):
+        self.vocab = {}                                   # term -> term id
+        self.idf = np.zeros(0, dtype=np.float32)          # per term
+        self.offsets = np.zeros(1, dtype=np.int64)        # term id -> postings slice
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)      # precomputed BM25 term weight
+        self.source_names = []
+        self.source_ids = np.zeros(0, dtype=np.int32)     # per document
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, records: List[Dict]):
+        """Queue chunk records (text, url, title, chunk_index, source) for indexing"""
+        self.records.extend({field: r.get(field) for field in RECORD_FIELDS} for r in records)
+        self.dirty = True
+
+    def remove_url(self, url: str):
+        """Drop every record of a page"""
+        kept = [r for r in self.records if r['url'] != url]
+        if len(kept) != len(self.records):
+            self.records = kept
+            self.dirty = True
+
+    def finalize(self):
+        """Rebuild the postings arrays and IDF from all records"""
+        self._reset_arrays()
+        n_docs = len(self.records)
+        if n_docs == 0:
+            self.dirty = False
+            return
+
+        postings = {}
+        doc_lengths = np.zeros(n_docs, dtype=np.float32)
+        for doc_id, record in enumerate(self.records):
+            tokens = tokenize(record['text'])
+            doc_lengths[doc_id] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_id, tf))
+        avg_length = float(doc_lengths.mean()) or 1.0
+
+        terms = sorted(postings)
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        sizes = np.fromiter((len(postings[t]) for t in terms), dtype=np.int64, count=len(terms))
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self.idf = np.log1p((n_docs - sizes + 0.5) / (sizes + 0.5)).astype(np.float32)
+
+        self.doc_ids = np.fromiter((d for t in terms for d, _ in postings[t]),
+                                   dtype=np.int32, count=int(self.offsets[-1]))
+        tfs = np.fromiter((tf for t in terms for _, tf in postings[t]),
+                          dtype=np.float32, count=int(self.offsets[-1]))
+        norm = self.k1 * (1 - self.b + self.b * doc_lengths[self.doc_ids] / avg_length)
+        term_idf = np.repeat(self.idf, sizes)
+        self.weights = (term_idf * tfs * (self.k1 + 1) / (tfs + norm)).astype(np.float32)
+
+        self.source_names = sorted({r.get('source') or "" for r in self.records})
+        source_lookup = {name: i for i, name in enumerate(self.source_names)}
+        self.source_ids = np.asarray([source_lookup[r.get('source') or ""] for r in self.records],
+                                     dtype=np.int32)
+        self.dirty = False
+
+    def search(self, query: str, top_k: int = 5, source: Optional[str] = None) -> List[Dict]:
+        """BM25 search; 'score' and 'coverage' are the fraction of query terms the chunk contains
+
+        Term coverage is coarser than cosine similarity, so relevance checks on
+        lexical results use LEXICAL_MIN_SCORE (see min_relevance).
+        """
+        if self.dirty:
+            self.finalize()
+
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        term_ids = [self.vocab[t] for t in query_terms if t in self.vocab]
+        if not term_ids or not self.records:
+            return []
+
+        scores = np.zeros(len(self.records), dtype=np.float32)
+        matched = np.zeros(len(self.records), dtype=np.int32)
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_ids[start:end]
+            scores[docs] += self.weights[start:end]
+            matched[docs] += 1
+
+        if source:
+            if source not in self.source_names:
+                return []
+            scores[self.source_ids != self.source_names.index(source)] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) == 0:
+            return []
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        ranked = candidates[np.argsort(-scores[candidates])]
+
+        return [
+            dict(self.records[doc], score=float(matched[doc]) / len(query_terms),
+                 coverage=float(matched[doc]) / len(query_terms), bm25=float(scores[doc]))
+            for doc in ranked
+        ]
+
+    def save(self, path: str):
+        """Persist the index to a single .npz file, replacing any existing one atomically"""
+        if self.dirty:
+            self.finalize()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Serving processes reload the file when its mtime changes; never let them see a partial write
+        staging = path + ".tmp.npz"
+        np.savez(
+            staging,
+            params=np.asarray([self.k1, self.b], dtype=np.float64),
+            vocab=np.asarray(json.dumps(list(self.vocab))),
+            records=np.asarray(json.dumps(self.records, ensure_ascii=False)),
+            source_names=np.asarray(json.dumps(self.source_names)),
+            idf=self.idf, offsets=self.offsets, doc_ids=self.doc_ids,
+            weights=self.weights, source_ids=self.source_ids
+        )
+        os.replace(staging, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load an index written by save()"""
+        with np.load(path) as data:
+            k1, b = data['params']
+            index = cls(k1=float(k1), b=float(b))
+            index.vocab = {term: i for i, term in enumerate(json.loads(str(data['vocab'])))}
+            index.records = json.loads(str(data['records']))
+            index.source_names = json.loads(str(data['source_names']))
+            index.idf = data['idf']
+            index.offsets = data['offsets']
+            index.doc_ids = data['doc_ids']
+            index.weights = data['weights']
+            index.source_ids = data['source_ids']
+        return index
+
+
+def min_relevance(mode: str, default: float) -> float:
+    """Relevance threshold for results of a retrieval mode"""
+    return LEXICAL_MIN_SCORE if mode == "lexical" else default
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], top_k: int, k: int = 60) -> List[Dict]:
+    """Merge ranked result lists by RRF
+
+    The relevance 'score' of each chunk comes from the first list (the dense
+    cosine in hybrid mode); chunks found only by later lists get 0.0.
+    """
+    fused = {}
+    for list_index, results in enumerate(result_lists):
+        for rank, hit in enumerate(results):
+            key = (hit['url'], hit['chunk_index'])
+            score = hit['score'] if list_index == 0 else 0.0
+            entry = fused.setdefault(key, dict(hit, rrf=0.0, score=score))
+            entry['rrf'] += 1.0 / (k + rank + 1)
+    return sorted(fused.values(), key=lambda hit: hit['rrf'], reverse=True)[:top_k]
+
+
+def keyword_hits(query: str, top_k: int, source: Optional[str],
+                 lexical_search: Callable[[str, int, Optional[str]], List[Dict]],
+                 max_fast_path_terms: int = 4) -> List[Dict]:
+    """Lexical hits for a short keyword lookup whose every term the top hit contains, else []"""
+    if len(tokenize(query)) > max_fast_path_terms:
+        return []
+    hits = lexical_search(query, top_k, source)
+    if hits and math.isclose(hits[0].get('coverage', 0.0), 1.0):
+        return hits
+    return []
+
+
+def retrieve(query: str, top_k: int, source: Optional[str], mode: str,
+             dense_search: Callable[[str, int, Optional[str]], List[Dict]],
+             lexical_search: Optional[Callable[[str, int, Optional[str]], List[Dict]]],
+             max_fast_path_terms: int = 4) -> List[Dict]:
+    """Dispatch a query to dense, lexical, hybrid or auto retrieval
+
+    auto answers short keyword lookups (every query term found in the top
+    lexical hit) from the lexical index alone and falls back to dense search.
+    """
+    if mode == "dense" or lexical_search is None:
+        return dense_search(query, top_k, source)
+    if mode == "lexical":
+        return lexical_search(query, top_k, source)
+    if mode == "hybrid":
+        depth = max(top_k * 4, 20)
+        return reciprocal_rank_fusion([
+            dense_search(query, depth, source),
+            lexical_search(query, depth, source)
+        ], top_k=top_k)
+    if mode == "auto":
+        return (keyword_hits(query, top_k, source, lexical_search, max_fast_path_terms)
+                or dense_search(query, top_k, source))
+    raise ValueError(f"Unknown retrieval mode: {mode}")
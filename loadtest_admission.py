@@ -0,0 +1,116 @@
+"""
+Load test for LLM admission control
+Starts a local OpenAI-compatible stub that is slow and rate limits above a fixed
+concurrency, then fires a burst of questions at RAGChatbot with and without a governor
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+import json
+import math
+import statistics
+import threading
+import time
+from admission import AdmissionController
+from chatbot import RAGChatbot
+
+STUB_LATENCY = 0.5        # seconds per completion
+STUB_MAX_CONCURRENT = 8   # above this the stub answers 429 like a rate-limited upstream
+CLIENTS = 64
+REQUESTS = 256
+
+
+class LLMStub(BaseHTTPRequestHandler):
+    """Minimal /v1/chat/completions endpoint"""
+    active = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with LLMStub.lock:
+            LLMStub.active += 1
+            overloaded = LLMStub.active > STUB_MAX_CONCURRENT
+        try:
+            if overloaded:
+                self._reply(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}})
+                return
+            time.sleep(STUB_LATENCY)
+            self._reply(200, {
+                "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": "stub",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "Stub answer."}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+            })
+        finally:
+            with LLMStub.lock:
+                LLMStub.active -= 1
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubRetriever:
+    """Returns the same relevant passage for every query, so only generation is under test"""
+
+    def search(self, query, top_k=5, source=None):
+        return [{'text': "Context OS is NeoSapients' platform for enterprise AI agents.",
+                 'url': "https://www.neosapients.ai/context-os", 'title': "Context OS",
+                 'chunk_index': 0, 'score': 0.8}]
+
+
+def run(chatbot: RAGChatbot, label: str):
+    """Send REQUESTS questions from CLIENTS threads and summarize the outcomes"""
+    def ask(i):
+        start = time.perf_counter()
+        answer = chatbot.generate_response(f"What is Context OS? ({i})")
+        return time.perf_counter() - start, answer
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CLIENTS) as clients:
+        outcomes = list(clients.map(ask, range(REQUESTS)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency, _ in outcomes)
+    generated = sum(answer.startswith("Stub answer") for _, answer in outcomes)
+    degraded = sum(answer.startswith("Retrieved Information") for _, answer in outcomes)
+    errors = sum(answer.startswith("Error generating response") for _, answer in outcomes)
+
+    print(f"\n{label}")
+    print(f"  generated={generated} retrieval-only={degraded} errors={errors} in {elapsed:.1f}s")
+    print(f"  latency p50={statistics.median(latencies):.0f}ms "
+          f"p95={latencies[math.ceil(0.95 * len(latencies)) - 1]:.0f}ms max={latencies[-1]:.0f}ms")
+    print(f"  governor: {chatbot.governor.metrics()}")
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LLMStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    print("=" * 80)
+    print("ADMISSION CONTROL LOAD TEST")
+    print("=" * 80)
+    print(f"{REQUESTS} requests from {CLIENTS} clients; stub: {STUB_LATENCY}s per answer, "
+          f"429 above {STUB_MAX_CONCURRENT} concurrent")
+
+    unlimited = AdmissionController(max_in_flight=CLIENTS, max_queue=REQUESTS)
+    governed = AdmissionController(max_in_flight=STUB_MAX_CONCURRENT, max_queue=16, queue_timeout=2.0)
+
+    for label, governor in [("No effective limit", unlimited), ("Governed", governed)]:
+        chatbot = RAGChatbot(StubRetriever(), api_key="stub", base_url=base_url, governor=governor)
+        chatbot.client = chatbot.client.with_options(max_retries=0)
+        run(chatbot, label)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
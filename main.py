@@ -1,11 +1,14 @@
 from scrapper import WebScraper
-from text_processor import TextChunker
+from text_processor import TextChunker, BoilerplateFilter, dedupe_chunks
 from milvus_manager import MilvusManager
+from sharded_milvus import ShardedMilvusManager
+from index_rebuild import blue_green_rebuild, current_version, drop_old_versions
 from dotenv import load_dotenv
+import argparse
 import os
 
 
-def main():
+def main(rebuild: bool = False, grace_seconds: float = 300):
     """Main pipeline to scrape, process, and store documents in Milvus"""
     
     # Load environment variables
@@ -42,9 +45,16 @@ def main():
     print("STEP 2: Text Processing and Chunking")
     print("=" * 70)
     
+    # Strip nav/footer/banner blocks repeated across pages of the same site
+    boilerplate = BoilerplateFilter(min_page_fraction=0.5, min_pages=3)
+    documents = boilerplate.fit_strip(documents)
+    
     chunker = TextChunker(chunk_size=500, chunk_overlap=50)
     chunks = chunker.process_documents(documents)
     
+    # Skip embedding exact duplicates
+    chunks = dedupe_chunks(chunks)
+    
     print(f"\nCreated {len(chunks)} text chunks")
     
     # Step 3: Set up Milvus and store embeddings
@@ -54,24 +64,50 @@ def main():
     
     milvus_host = os.getenv("MILVUS_HOST", "localhost")
     milvus_port = os.getenv("MILVUS_PORT", "19530")
-    
-    milvus = MilvusManager(
-        collection_name="rag_documents",
-        host=milvus_host,
-        port=milvus_port
-    )
+    milvus_uri = os.getenv("MILVUS_URI", "./milvus_demo.db")
+    shard_uris = os.getenv("MILVUS_SHARD_URIS")
+    
+    if shard_uris:
+        milvus = ShardedMilvusManager(
+            [uri.strip() for uri in shard_uris.split(",") if uri.strip()],
+            collection_name="rag_documents"
+        )
+    else:
+        milvus = MilvusManager(
+            collection_name="rag_documents",
+            host=milvus_host,
+            port=milvus_port,
+            uri=milvus_uri or None
+        )
     
     # Connect to Milvus
     milvus.connect()
     
-    # Create collection
-    milvus.create_collection()
-    
-    # Insert documents
-    milvus.insert_documents(chunks)
-    
-    # Load collection
-    milvus.load_collection()
+    if shard_uris and rebuild:
+        raise SystemExit("--rebuild supports a single Milvus instance; unset MILVUS_SHARD_URIS")
+    
+    # Once the stable name is an alias, dropping and recreating it would break serving
+    if not shard_uris and not rebuild and current_version(milvus):
+        print("rag_documents is a versioned alias; switching to a blue/green rebuild")
+        rebuild = True
+    
+    if rebuild:
+        # Build a new version beside the live one and swap the alias once it is warm
+        blue_green_rebuild(
+            milvus,
+            chunks,
+            probe_queries=["What is NeoSapients?", "What is Context OS?"],
+            grace_seconds=grace_seconds
+        )
+    else:
+        # Create collection
+        milvus.create_collection()
+        
+        # Insert documents
+        milvus.insert_documents(chunks)
+        
+        # Load collection
+        milvus.load_collection()
     
     print("\n" + "=" * 70)
     print("SETUP COMPLETE!")
@@ -99,5 +135,30 @@ def main():
     milvus.disconnect()
 
 
+def collect_old_versions():
+    """Drop every index version the alias no longer points to"""
+    load_dotenv()
+    milvus = MilvusManager(
+        collection_name="rag_documents",
+        host=os.getenv("MILVUS_HOST", "localhost"),
+        port=os.getenv("MILVUS_PORT", "19530"),
+        uri=os.getenv("MILVUS_URI", "./milvus_demo.db") or None
+    )
+    milvus.connect()
+    drop_old_versions(milvus)
+    milvus.disconnect()
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Scrape, chunk and index the pages in pagesurl.txt")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Blue/green rebuild: index into a new version and swap the alias (no downtime)")
+    parser.add_argument("--grace-seconds", type=float, default=300,
+                        help="How long a swapped-out version is kept; later rebuilds drop it after that")
+    parser.add_argument("--gc", action="store_true",
+                        help="Only drop swapped-out index versions now (after in-flight queries have drained)")
+    args = parser.parse_args()
+    if args.gc:
+        collect_old_versions()
+    else:
+        main(rebuild=args.rebuild, grace_seconds=args.grace_seconds)
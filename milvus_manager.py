@@ -1,30 +1,85 @@
 from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from encoders import create_encoder
+from typing import List, Dict, Optional
+from text_processor import source_from_url
+from lexical_index import BM25Index, retrieve
+import json
 import os
+import time
 
 
 class MilvusManager:
     """Manages Milvus vector database operations"""
     
     def __init__(self, collection_name: str = "rag_documents", 
-                 host: str = "localhost", port: str = "19530"):
+                 host: str = "localhost", port: str = "19530",
+                 uri: Optional[str] = "./milvus_demo.db", num_partitions: int = 64,
+                 alias: str = "default", encoder: Optional[SentenceTransformer] = None,
+                 retrieval_mode: str = "dense", encoder_backend: Optional[str] = None,
+                 encoder_threads: Optional[int] = None):
         self.collection_name = collection_name
         self.host = host
         self.port = port
+        self.uri = uri
+        self.num_partitions = num_partitions
+        self.alias = alias
         self.collection = None
-        self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
+        self.artifact = None
+        self.model_name = 'all-MiniLM-L6-v2'
+        self.encoder = encoder or create_encoder(self.model_name, backend=encoder_backend,
+                                                 threads=encoder_threads)
         self.embedding_dim = 384  # Dimension for all-MiniLM-L6-v2
+        self.index_params = {
+            "metric_type": "COSINE",
+            "index_type": "IVF_FLAT",
+            "params": {"nlist": 128}
+        }
+        self.search_params = {"metric_type": "COSINE", "params": {"nprobe": 10}}
+        # dense, lexical, hybrid (reciprocal rank fusion) or auto (lexical fast path)
+        self.retrieval_mode = retrieval_mode
+        self.lexical = BM25Index()
+        self.lexical_path = self._lexical_path()
+        self._lexical_mtime = None
+        self._lexical_checked = 0.0
+    
+    def _lexical_path(self) -> str:
+        """BM25 index file for this collection"""
+        return self._lexical_path_for(self.uri, self.collection_name)
+    
+    @staticmethod
+    def _lexical_path_for(uri: Optional[str], collection_name: str) -> str:
+        """BM25 index file stored next to the Milvus Lite file (or in the working directory)"""
+        if uri and "://" not in uri:
+            return f"{os.path.splitext(uri)[0]}.{collection_name}.bm25.npz"
+        return f"./{collection_name}.bm25.npz"
+    
+    def _load_lexical(self):
+        """Load the BM25 index file if it exists"""
+        if os.path.exists(self.lexical_path):
+            self.lexical = BM25Index.load(self.lexical_path)
+            self._lexical_mtime = os.path.getmtime(self.lexical_path)
+    
+    def _refresh_lexical(self, interval: float = 30.0):
+        """Pick up a BM25 index swapped in by a blue/green rebuild (checked at most every interval seconds)"""
+        now = time.monotonic()
+        if self.artifact is not None or now - self._lexical_checked < interval:
+            return
+        self._lexical_checked = now
+        if os.path.exists(self.lexical_path) and os.path.getmtime(self.lexical_path) != self._lexical_mtime:
+            self._load_lexical()
         
     def connect(self):
         """Connect to Milvus server"""
         try:
-            # Use Milvus Lite (embedded mode)
-            connections.connect(
-                alias="default",
-                uri="./milvus_demo.db"
-            )
-            print(f"Connected to Milvus Lite (embedded mode)")
+            if self.uri:
+                # Milvus Lite file (embedded mode) or a full server URI
+                connections.connect(alias=self.alias, uri=self.uri)
+                print(f"Connected to Milvus at {self.uri}")
+            else:
+                # Standalone server from MILVUS_HOST / MILVUS_PORT
+                connections.connect(alias=self.alias, host=self.host, port=self.port)
+                print(f"Connected to Milvus at {self.host}:{self.port}")
         except Exception as e:
             print(f"Error connecting to Milvus: {str(e)}")
             raise
@@ -32,8 +87,8 @@ class MilvusManager:
     def create_collection(self):
         """Create a collection for storing document embeddings"""
         # Drop existing collection if it exists
-        if utility.has_collection(self.collection_name):
-            utility.drop_collection(self.collection_name)
+        if utility.has_collection(self.collection_name, using=self.alias):
+            utility.drop_collection(self.collection_name, using=self.alias)
             print(f"Dropped existing collection: {self.collection_name}")
         
         # Define schema
@@ -43,29 +98,29 @@ class MilvusManager:
             FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=65535),
             FieldSchema(name="url", dtype=DataType.VARCHAR, max_length=500),
             FieldSchema(name="title", dtype=DataType.VARCHAR, max_length=500),
-            FieldSchema(name="chunk_index", dtype=DataType.INT64)
+            FieldSchema(name="chunk_index", dtype=DataType.INT64),
+            # Source site; Milvus hashes it into partitions so scoped searches skip other sites
+            FieldSchema(name="source", dtype=DataType.VARCHAR, max_length=255, is_partition_key=True)
         ]
         
         schema = CollectionSchema(fields=fields, description="RAG document collection")
         
         # Create collection
-        self.collection = Collection(name=self.collection_name, schema=schema)
+        self.collection = Collection(name=self.collection_name, schema=schema,
+                                     using=self.alias, num_partitions=self.num_partitions)
+        self.lexical = BM25Index()
         print(f"Created collection: {self.collection_name}")
         
         # Create index
-        index_params = {
-            "metric_type": "COSINE",
-            "index_type": "IVF_FLAT",
-            "params": {"nlist": 128}
-        }
-        self.collection.create_index(field_name="embedding", index_params=index_params)
+        self.collection.create_index(field_name="embedding", index_params=self.index_params)
         print("Created index on embedding field")
         
     def load_collection(self):
         """Load collection into memory"""
         if not self.collection:
-            self.collection = Collection(self.collection_name)
+            self.collection = Collection(self.collection_name, using=self.alias)
         self.collection.load()
+        self._load_lexical()
         print(f"Loaded collection: {self.collection_name}")
     
     def insert_documents(self, chunks: List[Dict]):
@@ -76,58 +131,126 @@ class MilvusManager:
         
         # Prepare data
         texts = [chunk['text'] for chunk in chunks]
-        urls = [chunk['metadata']['url'] for chunk in chunks]
-        titles = [chunk['metadata']['title'] for chunk in chunks]
-        chunk_indices = [chunk['metadata']['chunk_index'] for chunk in chunks]
         
         # Generate embeddings
         print(f"Generating embeddings for {len(texts)} chunks...")
         embeddings = self.encoder.encode(texts, show_progress_bar=True)
         
-        # Insert data
+        records = [dict(chunk['metadata'], text=chunk['text']) for chunk in chunks]
+        self.insert_vectors(embeddings.tolist(), records)
+        self.collection.flush()
+        self.save_lexical()
+        print(f"Inserted {len(texts)} chunks into Milvus")
+    
+    def insert_vectors(self, embeddings: List[List[float]], records: List[Dict]):
+        """Insert precomputed embeddings with their text/url/title/chunk_index records"""
+        records = [dict(r, source=r.get('source') or source_from_url(r['url'])) for r in records]
         entities = [
-            embeddings.tolist(),
-            texts,
-            urls,
-            titles,
-            chunk_indices
+            embeddings,
+            [r['text'] for r in records],
+            [r['url'] for r in records],
+            [r['title'] for r in records],
+            [r['chunk_index'] for r in records],
+            [r['source'] for r in records]
         ]
-        
         self.collection.insert(entities)
-        self.collection.flush()
-        print(f"Inserted {len(texts)} chunks into Milvus")
+        self.lexical.add(records)
+    
+    def save_lexical(self):
+        """Persist the BM25 index next to the collection"""
+        self.lexical.save(self.lexical_path)
+        self._lexical_mtime = os.path.getmtime(self.lexical_path)
+    
+    def indexed_records(self) -> List[Dict]:
+        """Chunk records currently indexed (tracked by the BM25 index)"""
+        return self.lexical.records
+    
+    def delete_url(self, url: str):
+        """Remove every chunk of a page (before re-inserting its new version)"""
+        self.collection.delete(f"url == {json.dumps(url)}")
+        self.lexical.remove_url(url)
+    
+    def search(self, query: str, top_k: int = 5, source: Optional[str] = None,
+               mode: Optional[str] = None, query_embedding=None) -> List[Dict]:
+        """Search for similar documents, optionally restricted to one source site
+        
+        A precomputed query_embedding is used for the dense side instead of encoding the query.
+        """
+        self._refresh_lexical()
+        lexical_search = self.lexical.search if len(self.lexical) else None
+        dense_search = self._dense_search
+        if query_embedding is not None:
+            dense_search = lambda _, k, src: self.search_vector(query_embedding, top_k=k, source=src)
+        return retrieve(query, top_k, source, mode or self.retrieval_mode,
+                        dense_search, lexical_search)
     
-    def search(self, query: str, top_k: int = 5) -> List[Dict]:
-        """Search for similar documents"""
+    def _dense_search(self, query: str, top_k: int, source: Optional[str]) -> List[Dict]:
+        """Embed the query and run a vector search"""
         # Generate query embedding
         query_embedding = self.encoder.encode([query])[0]
+        return self.search_vector(query_embedding, top_k=top_k, source=source)
+    
+    def search_vector(self, query_embedding, top_k: int = 5,
+                      source: Optional[str] = None) -> List[Dict]:
+        """Search with a precomputed query embedding"""
+        return self.search_vectors([query_embedding], top_k=top_k, source=source)[0]
+    
+    def search_vectors(self, query_embeddings, top_k: int = 5,
+                       source: Optional[str] = None) -> List[List[Dict]]:
+        """Search several precomputed query embeddings in one request"""
+        # Serve from a prebuilt artifact when one is open
+        if self.artifact is not None:
+            return [self.artifact.search(e, top_k=top_k, source=source) for e in query_embeddings]
         
-        # Search
-        search_params = {"metric_type": "COSINE", "params": {"nprobe": 10}}
+        # Filtering on the partition key limits the search to that site's partition
+        expr = f"source == {json.dumps(source)}" if source else None
         
+        # Search
         results = self.collection.search(
-            data=[query_embedding.tolist()],
+            data=[list(map(float, e)) for e in query_embeddings],
             anns_field="embedding",
-            param=search_params,
+            param=self.search_params,
             limit=top_k,
-            output_fields=["text", "url", "title", "chunk_index"]
+            expr=expr,
+            output_fields=["text", "url", "title", "chunk_index", "source"]
         )
         
         # Format results
         formatted_results = []
         for hits in results:
-            for hit in hits:
-                formatted_results.append({
+            formatted_results.append([
+                {
                     'text': hit.entity.get('text'),
                     'url': hit.entity.get('url'),
                     'title': hit.entity.get('title'),
                     'chunk_index': hit.entity.get('chunk_index'),
+                    'source': hit.entity.get('source'),
                     'score': hit.score
-                })
+                }
+                for hit in hits
+            ])
         
         return formatted_results
     
+    def export_artifact(self, path: str):
+        """Export the collection to a portable index artifact"""
+        from index_artifact import export_index
+        export_index(self, path)
+    
+    def open_artifact(self, path: str):
+        """Serve searches from a prebuilt index artifact instead of Milvus"""
+        from index_artifact import IndexArtifact
+        self.artifact = IndexArtifact.open(path, expected_model=self.model_name,
+                                           expected_dim=self.embedding_dim)
+        self.lexical = self.artifact.lexical_index()
+        print(f"Opened index artifact: {path} ({len(self.artifact)} chunks)")
+    
+    def import_artifact(self, path: str):
+        """Load a prebuilt index artifact into a fresh collection without re-embedding"""
+        from index_artifact import import_index
+        import_index(self, path)
+    
     def disconnect(self):
         """Disconnect from Milvus"""
-        connections.disconnect("default")
+        connections.disconnect(self.alias)
         print("Disconnected from Milvus")
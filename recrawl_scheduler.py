@@ -0,0 +1,285 @@
+"""
+Adaptive recrawl scheduler
+Revisits each URL at a rate matched to how often its content has been seen to change,
+within a global fetch budget, and re-indexes only the pages that changed.
+"""
+
+from scrapper import WebScraper
+from text_processor import TextChunker, BoilerplateFilter, dedupe_chunks, text_hash
+from typing import List, Dict, Optional
+from dotenv import load_dotenv
+import argparse
+import heapq
+import json
+import math
+import os
+import time
+
+# Bump when the content hash changes meaning; older hashes are re-baselined, not counted as changes
+HASH_SCHEME = 2
+
+
+class PageStats:
+    """Fetch history of one URL and its estimated change rate"""
+
+    def __init__(self, url: str, visits: int = 0, changes: int = 0, observed_seconds: float = 0.0,
+                 last_fetch: Optional[float] = None, last_hash: Optional[str] = None):
+        self.url = url
+        self.visits = visits                      # revisits that could observe a change
+        self.changes = changes                    # revisits where the content hash differed
+        self.observed_seconds = observed_seconds  # total time covered by those revisits
+        self.last_fetch = last_fetch
+        self.last_hash = last_hash
+
+    def change_rate(self, prior_interval: float) -> float:
+        """Estimated changes per second
+
+        Poisson estimator for periodic checks that only see whether a page
+        changed, not how often: -log((n - X + 0.5) / (n + 0.5)) / mean interval.
+        Floored at one change per (observed time + prior_interval), so a page
+        that has never changed backs off gradually instead of being dropped.
+        """
+        floor = 1.0 / (self.observed_seconds + prior_interval)
+        if self.visits == 0:
+            return floor
+        mean_interval = max(1.0, self.observed_seconds / self.visits)
+        unchanged = self.visits - self.changes + 0.5
+        return max(floor, -math.log(unchanged / (self.visits + 0.5)) / mean_interval)
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+class RecrawlScheduler:
+    """Priority-queue recrawler that spends a fetch budget where content actually changes"""
+
+    def __init__(self, urls: List[str], milvus_manager=None, state_path: str = "recrawl_state.json",
+                 fetch_budget: int = 60, budget_window: float = 3600.0,
+                 min_interval: float = 3600.0, max_interval: float = 30 * 86400.0,
+                 prior_interval: float = 86400.0, target_staleness: float = 0.5):
+        self.milvus = milvus_manager
+        self.state_path = state_path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.prior_interval = prior_interval
+        # Revisit once the chance of having missed a change reaches this probability
+        self.target_staleness = target_staleness
+
+        # Token bucket: fetch_budget pages per budget_window seconds across all URLs
+        self.fetch_budget = fetch_budget
+        self.refill_rate = fetch_budget / budget_window
+        self.tokens = float(fetch_budget)
+        self.last_refill = time.time()
+
+        self.scraper = WebScraper([], save_dir="scraped_pages")
+        self.chunker = TextChunker(chunk_size=500, chunk_overlap=50)
+        self.boilerplate = BoilerplateFilter(min_page_fraction=0.5, min_pages=3)
+        self.latest_docs = {}  # url -> last successfully scraped document, for boilerplate learning
+
+        self.pages = self._load_state()
+        for url in urls:
+            self.pages.setdefault(url, PageStats(url))
+        for url in list(self.pages):
+            if url not in urls:
+                del self.pages[url]
+
+        self.queue = [(self.next_due(stats), url) for url, stats in self.pages.items()]
+        heapq.heapify(self.queue)
+
+    def _load_state(self) -> Dict[str, PageStats]:
+        """Per-URL history and the learned boilerplate block hashes"""
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.boilerplate.boilerplate = {source: set(hashes)
+                                        for source, hashes in state.get('boilerplate', {}).items()}
+        pages = {url: PageStats(**data) for url, data in state['pages'].items()}
+        if state.get('hash_scheme') != HASH_SCHEME:
+            for stats in pages.values():
+                stats.last_hash = None
+        return pages
+
+    def save_state(self):
+        """Write the per-URL history atomically"""
+        state = {
+            'pages': {url: stats.to_dict() for url, stats in self.pages.items()},
+            'boilerplate': {source: sorted(hashes) for source, hashes in self.boilerplate.boilerplate.items()},
+            'hash_scheme': HASH_SCHEME,
+        }
+        staging = self.state_path + ".tmp"
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(staging, self.state_path)
+
+    def revisit_interval(self, stats: PageStats) -> float:
+        """Seconds until P(page changed) reaches target_staleness, clamped to [min, max]"""
+        rate = stats.change_rate(self.prior_interval)
+        interval = -math.log(1.0 - self.target_staleness) / rate
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def next_due(self, stats: PageStats) -> float:
+        """Unfetched pages are due immediately"""
+        if stats.last_fetch is None:
+            return 0.0
+        return stats.last_fetch + self.revisit_interval(stats)
+
+    def change_probability(self, stats: PageStats, now: float) -> float:
+        """Probability the page changed since it was last fetched"""
+        if stats.last_fetch is None:
+            return 1.0
+        return 1.0 - math.exp(-stats.change_rate(self.prior_interval) * (now - stats.last_fetch))
+
+    def _refill(self, now: float):
+        self.tokens = min(self.fetch_budget, self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+    def due_urls(self, now: float) -> List[str]:
+        """Pop the due URLs the budget allows, most likely changed first; the rest stay queued"""
+        self._refill(now)
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            due.append(heapq.heappop(self.queue))
+
+        due.sort(key=lambda item: self.change_probability(self.pages[item[1]], now), reverse=True)
+        allowed = int(self.tokens)
+        for item in due[allowed:]:
+            heapq.heappush(self.queue, item)
+        self.tokens -= min(allowed, len(due))
+        return [url for _, url in due[:allowed]]
+
+    def fetch(self, url: str, now: float) -> Optional[Dict]:
+        """Scrape one URL; a failed scrape is retried after min_interval"""
+        doc = self.scraper.scrape_page(url)
+
+        # scrape_page only returns text blocks on success
+        if 'blocks' not in doc:
+            heapq.heappush(self.queue, (now + self.min_interval, url))
+            return None
+
+        self.latest_docs[url] = doc
+        return doc
+
+    @staticmethod
+    def content_blocks(doc: Dict) -> List[str]:
+        """Page blocks without the site chrome identified from markup (nav, page header/footer, cookie banners)"""
+        chrome = set(doc.get('chrome', ()))
+        return [block for block in doc['blocks'] if block not in chrome]
+
+    def record(self, url: str, doc: Dict, fetched_at: float) -> bool:
+        """Update the URL's history with a fetched document; True if its content changed"""
+        stats = self.pages[url]
+        # Hash without site chrome so a footer or banner edit does not mark every page as
+        # changed. This must not depend on the learned boilerplate, which lags behind a
+        # site-wide edit until most pages have been refetched.
+        content_hash = text_hash(' '.join(self.content_blocks(doc)))
+        changed = content_hash != stats.last_hash
+        # Without a comparable previous hash the visit only sets the baseline
+        if stats.last_fetch is not None and stats.last_hash is not None:
+            stats.visits += 1
+            stats.changes += int(changed)
+            stats.observed_seconds += fetched_at - stats.last_fetch
+        stats.last_fetch = fetched_at
+        stats.last_hash = content_hash
+
+        heapq.heappush(self.queue, (self.next_due(stats), url))
+        return changed
+
+    def refit_boilerplate(self):
+        """Relearn boilerplate once every page has been seen in this process; until then reuse the saved one"""
+        if len(self.latest_docs) == len(self.pages):
+            self.boilerplate.fit(list(self.latest_docs.values()))
+
+    def reindex(self, changed_docs: List[Dict]):
+        """Replace the chunks of changed pages only"""
+        if not changed_docs or self.milvus is None:
+            return
+
+        documents = []
+        for doc in changed_docs:
+            blocks = self.content_blocks(doc)
+            documents.append(self.boilerplate.strip(dict(doc, blocks=blocks, content=' '.join(blocks))))
+
+        for doc in changed_docs:
+            self.milvus.delete_url(doc['url'])
+
+        # Skip chunks that other pages already have in the index, as main.py's corpus-wide dedupe would
+        indexed = {text_hash(record['text']) for record in self.milvus.indexed_records()}
+        chunks = dedupe_chunks(self.chunker.process_documents(documents), indexed)
+        if chunks:
+            self.milvus.insert_documents(chunks)
+        else:
+            self.milvus.save_lexical()
+        print(f"Re-indexed {len(changed_docs)} changed pages ({len(chunks)} chunks)")
+
+    def run_once(self, politeness: float = 1.0) -> int:
+        """Fetch everything due now within budget; returns the number of changed pages"""
+        fetched = []
+        for url in self.due_urls(time.time()):
+            print(f"Fetching {url}")
+            now = time.time()
+            doc = self.fetch(url, now)
+            if doc is not None:
+                fetched.append((url, doc, now))
+            time.sleep(politeness)
+
+        self.refit_boilerplate()
+        changed = [doc for url, doc, fetched_at in fetched if self.record(url, doc, fetched_at)]
+
+        self.reindex(changed)
+        self.save_state()
+        return len(changed)
+
+    def run_forever(self, poll_seconds: float = 60.0):
+        """Long-running loop: wake up, fetch due pages, sleep until the next is due"""
+        while True:
+            self.run_once()
+            next_due = self.queue[0][0] if self.queue else time.time() + poll_seconds
+            time.sleep(max(1.0, min(poll_seconds, next_due - time.time())))
+
+    def report(self) -> List[Dict]:
+        """Per-URL change rate and next revisit, soonest first"""
+        now = time.time()
+        rows = []
+        for due, url in sorted(self.queue):
+            stats = self.pages[url]
+            rows.append({
+                'url': url,
+                'visits': stats.visits,
+                'changes': stats.changes,
+                'changes_per_day': stats.change_rate(self.prior_interval) * 86400,
+                'due_in_hours': max(0.0, due - now) / 3600,
+            })
+        return rows
+
+
+if __name__ == "__main__":
+    from chatbot import open_milvus_from_env
+
+    parser = argparse.ArgumentParser(description="Adaptive recrawl of the pages in pagesurl.txt")
+    parser.add_argument("--once", action="store_true", help="Run one scheduling pass and exit")
+    parser.add_argument("--budget", type=int, default=60, help="Page fetches allowed per hour")
+    parser.add_argument("--report", action="store_true", help="Print change rates and exit")
+    args = parser.parse_args()
+
+    load_dotenv()
+    with open('pagesurl.txt', 'r') as f:
+        urls = [line.strip() for line in f if line.strip()]
+
+    milvus = None
+    if not args.report:
+        # Same shards or single instance that serving reads; artifacts are read-only
+        milvus = open_milvus_from_env(allow_artifact=False)
+
+    scheduler = RecrawlScheduler(urls, milvus, fetch_budget=args.budget)
+    if args.report:
+        for row in scheduler.report():
+            print(f"{row['url']}\n   visits={row['visits']} changes={row['changes']} "
+                  f"rate={row['changes_per_day']:.2f}/day due in {row['due_in_hours']:.1f}h")
+    elif args.once:
+        scheduler.run_once()
+    else:
+        scheduler.run_forever()
+
+    if milvus is not None:
+        milvus.disconnect()
@@ -0,0 +1,112 @@
+from lexical_index import keyword_hits, tokenize
+from typing import List, Dict, Optional
+import re
+import numpy as np
+
+
+FOLLOW_UP_WORDS = {"that", "it", "this", "those", "these", "they", "them", "its",
+                   "more", "else", "elaborate", "further", "also", "details"}
+
+
+class RetrievalContext:
+    """Per-session retrieval cache that reuses the previous turn's hits for follow-up questions"""
+
+    def __init__(self, milvus_manager, repeat_threshold: float = 0.9,
+                 follow_up_threshold: float = 0.55, reference_threshold: float = 0.25,
+                 max_follow_up_words: int = 8, max_cached_hits: int = 20):
+        self.milvus = milvus_manager
+        self.repeat_threshold = repeat_threshold
+        self.follow_up_threshold = follow_up_threshold
+        # Minimum similarity for a short question with a back-reference word ("its pricing?")
+        self.reference_threshold = reference_threshold
+        self.max_follow_up_words = max_follow_up_words
+        self.max_cached_hits = max_cached_hits
+        self.stats = {"searches": 0, "reused": 0, "extended": 0}
+        self.reset()
+
+    def reset(self):
+        """Forget the cached turn (e.g. when the chat is cleared)"""
+        self.last_vector = None
+        self.last_hits = []
+        self.last_source = None
+
+    def is_follow_up(self, query: str, similarity: float) -> bool:
+        """Close to the last query, or a short question that refers back to it"""
+        if similarity >= self.follow_up_threshold:
+            return True
+        words = re.findall(r"\w+", query.lower())
+        if len(words) > self.max_follow_up_words or not FOLLOW_UP_WORDS.intersection(words):
+            return False
+        # "Tell me more about that" has no topic of its own; "What careers are at this
+        # company?" does, and only counts as a follow-up if it is also somewhat similar
+        content_words = [w for w in tokenize(query) if w not in FOLLOW_UP_WORDS]
+        return not content_words or similarity >= self.reference_threshold
+
+    def retrieve(self, query: str, top_k: int = 5, source: Optional[str] = None) -> List[Dict]:
+        """Search, reuse or extend the cached hits depending on how the query relates to the last turn"""
+        mode = self.milvus.retrieval_mode
+
+        # Keyword retrieval never touches the encoder, so it bypasses the context; the cached
+        # turn is dropped so a later follow-up does not extend an older topic
+        if mode == "lexical":
+            self.reset()
+            self.stats["searches"] += 1
+            return self.milvus.search(query, top_k=top_k, source=source, mode="lexical")
+        if mode == "auto":
+            lexical_search = lambda q, k, src: self.milvus.search(q, top_k=k, source=src, mode="lexical")
+            hits = keyword_hits(query, top_k, source, lexical_search)
+            if hits:
+                self.reset()
+                self.stats["searches"] += 1
+                return hits
+            # The fast path missed, so auto falls back to dense search
+            mode = "dense"
+
+        vector = np.asarray(self.milvus.encoder.encode([query])[0], dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+
+        if self.last_vector is None or source != self.last_source:
+            return self._search(query, vector, top_k, source, mode)
+
+        similarity = float(vector @ self.last_vector)
+
+        # Same question rephrased: the cached hits already answer it
+        if similarity >= self.repeat_threshold and len(self.last_hits) >= top_k:
+            self.stats["reused"] += 1
+            return self.last_hits[:top_k]
+
+        if not self.is_follow_up(query, similarity):
+            return self._search(query, vector, top_k, source, mode)
+
+        # Follow-up: search around the blend of both turns and merge with what we already have
+        self.stats["extended"] += 1
+        blended = self.last_vector + vector
+        blended /= np.linalg.norm(blended) or 1.0
+        new_hits = self.milvus.search(query, top_k=top_k, source=source, mode=mode,
+                                      query_embedding=blended)
+
+        # The new search decides ranking and relevance. Cached hits were scored against the
+        # previous query, so they only fill in below it, capped at the new search's lowest score.
+        seen = {(hit['url'], hit['chunk_index']) for hit in new_hits}
+        floor = min((hit['score'] for hit in new_hits), default=0.0)
+        hits = list(new_hits) + [
+            dict(hit, score=min(hit['score'], floor)) for hit in self.last_hits
+            if (hit['url'], hit['chunk_index']) not in seen
+        ]
+
+        # Keep the topic anchored on the blended vector so the next follow-up stays on it
+        self._remember(blended, hits, source)
+        return hits[:top_k]
+
+    def _search(self, query: str, vector: np.ndarray, top_k: int, source: Optional[str],
+                mode: str) -> List[Dict]:
+        """Fresh search for a new topic, reusing the already computed query vector"""
+        self.stats["searches"] += 1
+        hits = self.milvus.search(query, top_k=top_k, source=source, mode=mode, query_embedding=vector)
+        self._remember(vector, hits, source)
+        return hits
+
+    def _remember(self, vector: np.ndarray, hits: List[Dict], source: Optional[str]):
+        self.last_vector = vector
+        self.last_hits = hits[:self.max_cached_hits]
+        self.last_source = source
@@ -1,10 +1,22 @@
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict
+from bs4.element import NavigableString, PreformattedString, Tag
+from typing import List, Dict, Tuple
+import re
 import time
 import os
 from pathlib import Path
 
+# Site chrome, kept as one block each so a repeated nav/footer is recognized as a unit
+SECTION_TAGS = {"nav", "header", "footer"}
+# Elements whose whole text forms one block
+BLOCK_TAGS = {"p", "li", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote",
+              "dt", "dd", "th", "td", "figcaption"}
+STRUCTURE_TAGS = list(SECTION_TAGS | BLOCK_TAGS | {"div"})
+# Site chrome recognizable from the markup alone: navigation, page header/footer, cookie banners
+CHROME_ROLES = {"navigation", "banner", "contentinfo"}
+CHROME_HINT = re.compile(r"cookie|consent|gdpr", re.IGNORECASE)
+
 
 class WebScraper:
     """Scrapes content from specified web pages"""
@@ -31,8 +43,9 @@ class WebScraper:
             for script in soup(["script", "style"]):
                 script.decompose()
             
-            # Extract text
-            text = soup.get_text(separator=' ', strip=True)
+            # Extract text per block-level element so repeated nav/footer blocks can be detected
+            blocks, chrome = self.extract_blocks(soup)
+            text = ' '.join(blocks)
             
             # Get title
             title = soup.title.string if soup.title else url
@@ -40,7 +53,9 @@ class WebScraper:
             return {
                 'url': url,
                 'title': title,
-                'content': text
+                'content': text,
+                'blocks': blocks,
+                'chrome': chrome
             }
         except Exception as e:
             print(f"Error scraping {url}: {str(e)}")
@@ -50,6 +65,62 @@ class WebScraper:
                 'content': f"Failed to scrape: {str(e)}"
             }
     
+    def extract_blocks(self, soup: BeautifulSoup) -> Tuple[List[str], List[str]]:
+        """Text of each block-level element in document order, and the blocks that are site chrome
+        
+        Inline markup (links, bold text) stays inside its sentence, so a phrase that
+        also appears in the nav is never cut out of body text.
+        """
+        blocks, chrome = [], []
+        self._collect_blocks(soup.body or soup, blocks, chrome)
+        return blocks, chrome
+    
+    def _is_chrome(self, tag: Tag) -> bool:
+        """Navigation, page-level header/footer or a cookie banner"""
+        if tag.name in ("nav", "footer") or tag.get("role") in CHROME_ROLES:
+            return True
+        # A header inside an article or section is part of the content
+        if tag.name == "header" and tag.find_parent(["article", "main", "section"]) is None:
+            return True
+        hints = " ".join([tag.get("id") or ""] + list(tag.get("class") or []))
+        return bool(CHROME_HINT.search(hints))
+    
+    def _collect_blocks(self, element: Tag, blocks: List[str], chrome: List[str]):
+        """Append the blocks under element; loose inline text between blocks forms its own block"""
+        run = []
+        
+        def flush(is_chrome: bool = False):
+            text = re.sub(r'\s+', ' ', ''.join(run)).strip()
+            if text:
+                blocks.append(text)
+                if is_chrome:
+                    chrome.append(text)
+            run.clear()
+        
+        for child in element.children:
+            if isinstance(child, Tag):
+                if self._is_chrome(child):
+                    flush()
+                    run.append(child.get_text(' ', strip=True))
+                    flush(is_chrome=True)
+                elif child.name in SECTION_TAGS or child.name in BLOCK_TAGS:
+                    flush()
+                    run.append(child.get_text(' ', strip=True))
+                    flush()
+                elif child.find(STRUCTURE_TAGS) is not None:
+                    # Container (div, section, main, ul, table...) holding blocks: descend
+                    flush()
+                    self._collect_blocks(child, blocks, chrome)
+                elif child.name == "div":
+                    flush()
+                    run.append(child.get_text(' ', strip=True))
+                    flush()
+                else:
+                    run.append(child.get_text(' '))
+            elif isinstance(child, NavigableString) and not isinstance(child, PreformattedString):
+                run.append(str(child))
+        flush()
+    
     def save_to_file(self, data: Dict[str, str], index: int):
         """Save scraped content to a text file"""
         filename = f"page_{index + 1}.txt"
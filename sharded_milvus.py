@@ -0,0 +1,149 @@
+from milvus_manager import MilvusManager
+from lexical_index import retrieve
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+import heapq
+import zlib
+
+
+class ShardedMilvusManager:
+    """Spreads chunks across several Milvus instances and searches them with scatter-gather"""
+
+    def __init__(self, shard_uris: List[str], collection_name: str = "rag_documents",
+                 num_partitions: int = 64, retrieval_mode: str = "dense",
+                 max_concurrent_searches: int = 8):
+        if not shard_uris:
+            raise ValueError("At least one shard URI is required")
+
+        self.collection_name = collection_name
+        self.retrieval_mode = retrieval_mode
+        self.shards = []
+        for idx, uri in enumerate(shard_uris):
+            # Shards share the first shard's encoder instead of loading the model N times
+            encoder = self.shards[0].encoder if self.shards else None
+            self.shards.append(MilvusManager(
+                collection_name=collection_name,
+                uri=uri,
+                num_partitions=num_partitions,
+                alias=f"shard{idx}",
+                encoder=encoder
+            ))
+        self.encoder = self.shards[0].encoder
+        self.embedding_dim = self.shards[0].embedding_dim
+        self.model_name = self.shards[0].model_name
+        # Every caller shares this pool and each search takes one worker per shard, so size it
+        # for max_concurrent_searches queries fanning out at once
+        self.executor = ThreadPoolExecutor(max_workers=len(self.shards) * max_concurrent_searches)
+
+    def shard_for(self, record: Dict) -> int:
+        """Stable shard assignment from the chunk's url and chunk index"""
+        key = f"{record['url']}#{record['chunk_index']}".encode('utf-8')
+        return zlib.crc32(key) % len(self.shards)
+
+    def connect(self):
+        """Connect to every shard"""
+        for shard in self.shards:
+            shard.connect()
+
+    def create_collection(self):
+        """Create the collection on every shard"""
+        for shard in self.shards:
+            shard.create_collection()
+
+    def load_collection(self):
+        """Load the collection on every shard"""
+        list(self.executor.map(lambda shard: shard.load_collection(), self.shards))
+
+    def insert_documents(self, chunks: List[Dict]):
+        """Embed chunks once and insert each into its shard"""
+        if not chunks:
+            print("No chunks to insert")
+            return
+
+        texts = [chunk['text'] for chunk in chunks]
+        print(f"Generating embeddings for {len(texts)} chunks...")
+        embeddings = self.encoder.encode(texts, show_progress_bar=True)
+
+        records = [dict(chunk['metadata'], text=chunk['text']) for chunk in chunks]
+        self.insert_vectors(embeddings.tolist(), records)
+        for shard in self.shards:
+            shard.collection.flush()
+            shard.save_lexical()
+        print(f"Inserted {len(texts)} chunks into {len(self.shards)} shards")
+
+    def insert_vectors(self, embeddings: List[List[float]], records: List[Dict]):
+        """Route precomputed embeddings and records to their shards"""
+        batches = [([], []) for _ in self.shards]
+        for embedding, record in zip(embeddings, records):
+            shard_embeddings, shard_records = batches[self.shard_for(record)]
+            shard_embeddings.append(embedding)
+            shard_records.append(record)
+
+        for shard, (shard_embeddings, shard_records) in zip(self.shards, batches):
+            if shard_records:
+                shard.insert_vectors(shard_embeddings, shard_records)
+
+    def save_lexical(self):
+        """Persist every shard's BM25 index"""
+        for shard in self.shards:
+            shard.save_lexical()
+
+    def indexed_records(self) -> List[Dict]:
+        """Chunk records currently indexed on every shard"""
+        return [record for shard in self.shards for record in shard.lexical.records]
+
+    def delete_url(self, url: str):
+        """Remove every chunk of a page from all shards"""
+        for shard in self.shards:
+            shard.delete_url(url)
+
+    def search(self, query: str, top_k: int = 5, source: Optional[str] = None,
+               mode: Optional[str] = None, query_embedding=None) -> List[Dict]:
+        """Search for similar documents across all shards"""
+        # Pick up BM25 files rewritten by the recrawler or a rebuild (throttled per shard)
+        for shard in self.shards:
+            shard._refresh_lexical()
+        has_lexical = any(len(shard.lexical) for shard in self.shards)
+        dense_search = self._dense_search
+        if query_embedding is not None:
+            dense_search = lambda _, k, src: self.search_vector(query_embedding, top_k=k, source=src)
+        return retrieve(query, top_k, source, mode or self.retrieval_mode,
+                        dense_search, self._lexical_search if has_lexical else None)
+
+    def _dense_search(self, query: str, top_k: int, source: Optional[str]) -> List[Dict]:
+        """Embed the query once and scatter the vector search"""
+        query_embedding = self.encoder.encode([query])[0]
+        return self.search_vector(query_embedding, top_k=top_k, source=source)
+
+    def _lexical_search(self, query: str, top_k: int, source: Optional[str]) -> List[Dict]:
+        """Query every shard's BM25 index and merge by BM25 score"""
+        shard_results = [shard.lexical.search(query, top_k=top_k, source=source) for shard in self.shards]
+        merged = heapq.merge(*shard_results, key=lambda hit: hit['bm25'], reverse=True)
+        return [hit for _, hit in zip(range(top_k), merged)]
+
+    def search_vector(self, query_embedding, top_k: int = 5,
+                      source: Optional[str] = None) -> List[Dict]:
+        """Fan the query out to every shard in parallel and merge the per-shard top-k"""
+        return self.search_vectors([query_embedding], top_k=top_k, source=source)[0]
+
+    def search_vectors(self, query_embeddings, top_k: int = 5,
+                       source: Optional[str] = None) -> List[List[Dict]]:
+        """Scatter a batch of queries to every shard and merge each query's per-shard top-k"""
+        futures = [
+            self.executor.submit(shard.search_vectors, query_embeddings, top_k, source)
+            for shard in self.shards
+        ]
+        shard_results = [future.result() for future in futures]
+
+        # Each shard's hits are already sorted by score, so a k-way heap merge suffices
+        merged_results = []
+        for per_query in zip(*shard_results):
+            merged = heapq.merge(*per_query, key=lambda hit: hit['score'], reverse=True)
+            merged_results.append([hit for _, hit in zip(range(top_k), merged)])
+        return merged_results
+
+    def disconnect(self):
+        """Disconnect from every shard"""
+        for shard in self.shards:
+            shard.disconnect()
+        self.executor.shutdown(wait=False)
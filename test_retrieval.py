@@ -4,6 +4,7 @@ This demonstrates that the RAG system is working and retrieving relevant content
 """
 
 from milvus_manager import MilvusManager
+from lexical_index import min_relevance
 
 def test_queries():
     """Test various queries to see what the system retrieves"""
@@ -39,11 +40,11 @@ def test_queries():
             print("❌ No results found")
             continue
         
-        best_score = results[0]['score']
+        best_score = max(result['score'] for result in results)
         print(f"\n✓ Best match score: {best_score:.4f}")
         
         # Check if query is relevant (score threshold)
-        if best_score < 0.3:
+        if best_score < min_relevance(milvus.retrieval_mode, 0.3):
             print("⚠️  LOW RELEVANCE - Chatbot would refuse to answer")
         else:
             print("✓ GOOD RELEVANCE - Chatbot would answer")
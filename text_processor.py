@@ -1,7 +1,87 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
+from collections import Counter, defaultdict
+from urllib.parse import urlparse
+import hashlib
 import re
 
 
+def source_from_url(url: str) -> str:
+    """Derive the source site (partition key) from a page URL"""
+    netloc = urlparse(url).netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def text_hash(text: str) -> str:
+    """Hash of whitespace- and case-normalized text"""
+    normalized = re.sub(r'\s+', ' ', text).strip().lower()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+class BoilerplateFilter:
+    """Learns text blocks repeated across pages of the same site (nav, footer, banners) and strips them"""
+    
+    def __init__(self, min_page_fraction: float = 0.5, min_pages: int = 3):
+        self.min_page_fraction = min_page_fraction
+        self.min_pages = min_pages
+        self.boilerplate = {}  # source -> set of block hashes
+    
+    def fit(self, documents: List[Dict]):
+        """Count, per site, how many pages each block hash appears on"""
+        pages_per_source = Counter()
+        block_counts = defaultdict(Counter)
+        
+        for doc in documents:
+            if not doc.get('blocks'):
+                continue
+            source = source_from_url(doc['url'])
+            pages_per_source[source] += 1
+            block_counts[source].update({text_hash(block) for block in doc['blocks']})
+        
+        self.boilerplate = {}
+        for source, n_pages in pages_per_source.items():
+            if n_pages < self.min_pages:
+                continue
+            threshold = self.min_page_fraction * n_pages
+            self.boilerplate[source] = {
+                h for h, count in block_counts[source].items() if count > threshold
+            }
+    
+    def strip(self, doc: Dict) -> Dict:
+        """Return a copy of the document without its site's boilerplate blocks"""
+        repeated = self.boilerplate.get(source_from_url(doc['url']))
+        if not repeated or not doc.get('blocks'):
+            return doc
+        
+        blocks = [block for block in doc['blocks'] if text_hash(block) not in repeated]
+        return dict(doc, blocks=blocks, content=' '.join(blocks))
+    
+    def fit_strip(self, documents: List[Dict]) -> List[Dict]:
+        """Learn boilerplate from the documents and strip it from each of them"""
+        self.fit(documents)
+        stripped = [self.strip(doc) for doc in documents]
+        
+        before = sum(len(doc['content']) for doc in documents)
+        after = sum(len(doc['content']) for doc in stripped)
+        n_blocks = sum(len(hashes) for hashes in self.boilerplate.values())
+        print(f"Stripped {n_blocks} repeated blocks ({before - after:,} of {before:,} characters)")
+        return stripped
+
+
+def dedupe_chunks(chunks: List[Dict], indexed: Optional[Set[str]] = None) -> List[Dict]:
+    """Drop chunks whose normalized text exactly matches an earlier chunk or an already indexed one"""
+    seen = set(indexed or ())
+    unique = []
+    for chunk in chunks:
+        h = text_hash(chunk['text'])
+        if h in seen:
+            continue
+        seen.add(h)
+        unique.append(chunk)
+    
+    print(f"Removed {len(chunks) - len(unique)} duplicate chunks ({len(unique)} remaining)")
+    return unique
+
+
 class TextChunker:
     """Splits text into chunks for embedding"""
     
@@ -72,7 +152,8 @@ class TextChunker:
         for doc in documents:
             metadata = {
                 'url': doc['url'],
-                'title': doc['title']
+                'title': doc['title'],
+                'source': source_from_url(doc['url'])
             }
             chunks = self.chunk_text(doc['content'], metadata)
             